@@ -19,7 +19,6 @@ Usage:
 
 import os
 import json
-import itertools
 import asyncio
 import pandas as pd
 from datetime import date
@@ -29,6 +28,7 @@ from typing import Dict, Any, List, Tuple
 from gpt_researcher import GPTResearcher
 from gpt_researcher.utils.llm import generic_prompt_call
 from argue_eval.judge import evaluate_report, ModelProvider
+from cli.prompt_generator import PromptSpace, build_preamble
 
 # -- Step 2: Load Config and Research Context
 CONFIG_PATH = "./config.dawn.Llama-3.3-70B-Instruct.json"
@@ -46,95 +46,6 @@ doc_dict = {...} # Place your doc_dict here
 with open(INSTRUCTION_JSON, "r") as f:
     instructions = json.load(f)
 
-total_words_options = instructions["total_words_options"]
-focus_instructions = instructions["focus_instructions"]
-structure_instructions = instructions["structure_instructions"]
-fact_instructions = instructions["fact_instructions"]
-length_instructions = instructions["length_instructions"]
-depth_instructions = instructions["depth_instructions"]
-opinion_instructions = instructions["opinion_instructions"]
-bias_instructions = instructions["bias_instructions"]
-citation_instructions = instructions["citation_instructions"]
-tone_instructions = instructions["tone_instructions"]
-formatting_instructions = instructions["formatting_instructions"]
-extra_instructions = instructions["extra_instructions"]
-
-# -- Step 4: Create Prompt Variants DataFrame
-
-def build_prompt(combo, query, background):
-    (
-        total_words,
-        focus_instruction,
-        structure_instruction,
-        fact_instruction,
-        length_instruction,
-        depth_instruction,
-        opinion_instruction,
-        bias_instruction,
-        citation_instruction,
-        tone_instruction,
-        formatting_instruction,
-        extra_instruction
-    ) = combo
-
-    prompt = f"""
-Information: "{query}"
----
-
-Using the above information, provide supporting facts for the query: "{background}"
-
-Report Requirements:
-- {focus_instruction}
-- {structure_instruction}
-- {fact_instruction}
-- {length_instruction.replace('{total_words}', str(total_words))}
-- {depth_instruction}
-- {opinion_instruction}
-- {bias_instruction}
-- {citation_instruction}
-- {tone_instruction}
-- {formatting_instruction}
-- {extra_instruction}
-""".strip()
-    return prompt
-
-def generate_prompt_df(query: str, background: str) -> pd.DataFrame:
-    all_combinations = list(itertools.product(
-        total_words_options,
-        focus_instructions,
-        structure_instructions,
-        fact_instructions,
-        length_instructions,
-        depth_instructions,
-        opinion_instructions,
-        bias_instructions,
-        citation_instructions,
-        tone_instructions,
-        formatting_instructions,
-        extra_instructions
-    ))
-    prompt_variants = []
-    for i, combo in enumerate(all_combinations):
-        prompt_text = build_prompt(combo, query, background)
-        prompt_variants.append({
-            "id": f"prompt_{i+1}",
-            "total_words": combo[0],
-            "focus_instruction": combo[1],
-            "structure_instruction": combo[2],
-            "fact_instruction": combo[3],
-            "length_instruction": combo[4],
-            "depth_instruction": combo[5],
-            "opinion_instruction": combo[6],
-            "bias_instruction": combo[7],
-            "citation_instruction": combo[8],
-            "tone_instruction": combo[9],
-            "formatting_instruction": combo[10],
-            "extra_instruction": combo[11],
-            "prompt_text": prompt_text
-        })
-    prompt_df = pd.DataFrame(prompt_variants)
-    return prompt_df
-
 # -- Step 5: Main Research/Prompt/Report/Eval Pipeline
 
 class CustomLogsHandler:
@@ -151,11 +62,10 @@ async def research_prompt_report_eval(
     report_type: str,
     num_to_generate: int = 5
 ) -> pd.DataFrame:
-    # 1. Generate prompts DataFrame
-    prompt_df = generate_prompt_df(query, background)
-    print(f"Total prompts generated: {len(prompt_df)}")
-    # Optionally sample or select a subset for generation
-    selected_prompts = prompt_df.sample(n=min(num_to_generate, len(prompt_df)), random_state=42)
+    # 1. Sample prompt variants (only the sampled prompts are rendered)
+    prompt_space = PromptSpace(instructions, build_preamble(query, background))
+    print(f"Total prompt variants: {len(prompt_space)}")
+    selected_prompts = prompt_space.sample(num_to_generate, random_state=42)
     # 2. Initialize researcher
     custom_logs_handler = CustomLogsHandler()
     researcher = GPTResearcher(query, background, report_type, websocket=custom_logs_handler, config_path=CONFIG_PATH)
@@ -0,0 +1,130 @@
+# to run (from the repository root)
+# python -m benchmarks.bench_chunking
+#
+# Compares the split_text_smart previously in trans_shell_single_final.py
+# (re.split of the whole text, string concatenation per chunk) with the
+# streaming iter_chunks it now wraps, and checks both give the same chunks on
+# random documents, from strings and from readers with small block sizes.
+
+import argparse
+import io
+import random
+import re
+import time
+
+from trans_shell_single_final import iter_chunks, split_text_smart
+
+WORDS = ["Райс", "демократия", "policy", "e.g.", "U.S.", "1989", "reform", "саммит", "государство", "the"]
+SEPARATORS = [" ", " ", " ", "\n", "\n\n", "\n \n", "    ", "      ", "\t\t\t\t", ". ", "! ", "? "]
+
+def legacy_split_text_smart(text, max_size=2000):
+    """Split text into chunks at natural breakpoints (sentences, paragraphs)"""
+    if len(text) <= max_size:
+        return [text]
+
+    chunks = []
+    current_chunk = ""
+
+    # Split by paragraphs first (double spaces or newlines)
+    paragraphs = re.split(r'\n\s*\n|\s{4,}', text)
+
+    for paragraph in paragraphs:
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        # If adding this paragraph would exceed limit
+        if len(current_chunk) + len(paragraph) + 1 > max_size:  # +1 for space
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+                current_chunk = ""
+
+            # If single paragraph is too long, split by sentences
+            if len(paragraph) > max_size:
+                sentences = re.split(r'(?<=[.!?])\s+', paragraph)
+                temp_chunk = ""
+
+                for sentence in sentences:
+                    if len(temp_chunk) + len(sentence) + 1 > max_size:
+                        if temp_chunk:
+                            chunks.append(temp_chunk.strip())
+                            temp_chunk = ""
+
+                    # If single sentence is still too long, force split
+                    if len(sentence) > max_size:
+                        while len(sentence) > max_size:
+                            chunks.append(sentence[:max_size].strip())
+                            sentence = sentence[max_size:]
+                        if sentence.strip():
+                            temp_chunk = sentence
+                    else:
+                        temp_chunk += (" " if temp_chunk else "") + sentence
+
+                if temp_chunk.strip():
+                    current_chunk = temp_chunk
+            else:
+                current_chunk = paragraph
+        else:
+            current_chunk += (" " if current_chunk else "") + paragraph
+
+    if current_chunk.strip():
+        chunks.append(current_chunk.strip())
+
+    return chunks
+
+def synthetic_document(rng, tokens):
+    """Words, sentence ends, paragraph breaks, whitespace runs and the odd unbroken run."""
+    parts = []
+    for _ in range(tokens):
+        if rng.random() < 0.02:
+            parts.append("x" * rng.randint(1, 300))
+        else:
+            parts.append(rng.choice(WORDS))
+        parts.append(rng.choice(SEPARATORS))
+    if rng.random() < 0.3:
+        parts.insert(0, rng.choice(SEPARATORS))
+    return "".join(parts)
+
+def check_equivalence(cases, seed):
+    rng = random.Random(seed)
+    for case in range(cases):
+        text = synthetic_document(rng, rng.randint(0, 400))
+        max_size = rng.choice([5, 17, 40, 100, 333])
+        block_size = rng.choice([1, 3, 16, 64, 1000])
+        expected = legacy_split_text_smart(text, max_size)
+
+        assert split_text_smart(text, max_size) == expected, f"case {case}: split_text_smart differs from legacy"
+        spans = list(iter_chunks(io.StringIO(text), max_size, block_size))
+        assert [chunk for chunk, _, _ in spans] == expected, f"case {case}: reader chunks differ (block_size {block_size})"
+        for chunk, start, end in spans:
+            # Offsets cover the chunk's text; only whitespace between its pieces is collapsed.
+            assert text[start:end].split() == chunk.split(), f"case {case}: offsets {start}:{end} do not match the chunk"
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=20000, help="random documents checked against the legacy function")
+    parser.add_argument("--megabytes", type=int, default=8, help="size of the document timed")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    check_equivalence(args.cases, args.seed)
+    print(f"{args.cases} random documents: identical chunks from strings and readers")
+
+    rng = random.Random(args.seed)
+    text = synthetic_document(rng, args.megabytes * 2**20 // 11)  # about 11 characters per token
+    print(f"timing on {len(text) / 2**20:.1f}M characters")
+
+    start = time.perf_counter()
+    legacy = legacy_split_text_smart(text)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks = split_text_smart(text)
+    streaming_time = time.perf_counter() - start
+
+    assert legacy == chunks, "split_text_smart output differs from legacy chunking"
+    print(f"legacy split_text_smart: {legacy_time:.2f} s")
+    print(f"iter_chunks:             {streaming_time:.2f} s ({legacy_time / streaming_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
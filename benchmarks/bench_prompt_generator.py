@@ -0,0 +1,71 @@
+# to run (from the repository root)
+# python -m benchmarks.bench_prompt_generator
+#
+# Compares the eager generate_prompt_df against the compiled PromptSpace on
+# synthetic instruction sets of growing size: time to build the variant table,
+# time to render every prompt, and memory held by the table.
+
+import argparse
+import time
+import tracemalloc
+
+from cli.prompt_generator import DIMENSIONS, generate_prompt_df, generate_prompt_space
+
+QUERY = "Produce a report on the mysteries of Machu Picchu's architecture."
+BACKGROUND = "As an archaeologist leading an expedition in South America, I require insights."
+
+def synthetic_instructions(options_per_dimension, words=12):
+    """
+    Instruction sets with the same shape as instruction_sets.json.
+    """
+    instructions = {}
+    for _, key in DIMENSIONS:
+        instructions[key] = [
+            " ".join(f"{key}_{i}_{w}" for w in range(words)) + "." for i in range(options_per_dimension)
+        ]
+    instructions["total_words_options"] = [500 * (i + 1) for i in range(options_per_dimension)]
+    instructions["length_instructions"] = [
+        f"Keep the report within {{total_words}} words (variant {i})." for i in range(options_per_dimension)
+    ]
+    return instructions
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser()
+    # Options per dimension; 3 already means 3**12 = 531441 variants.
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2])
+    args = parser.parse_args()
+
+    print(f"{'options':>7} {'variants':>9} {'method':<22} {'seconds':>8} {'peak MB':>8} {'bytes/row':>10}")
+    for size in args.sizes:
+        instructions = synthetic_instructions(size)
+
+        df, df_time, df_peak = measure(lambda: generate_prompt_df(QUERY, BACKGROUND, instructions))
+        n = len(df)
+        df_bytes = df.memory_usage(deep=True).sum()
+        del df
+
+        space = generate_prompt_space(QUERY, BACKGROUND, instructions)
+        table, table_time, table_peak = measure(lambda: space.to_df(range(n), prompt_text=False))
+        table_bytes = table.memory_usage(deep=True).sum()
+        del table
+        _, render_time, render_peak = measure(lambda: space.render_batch(range(n)))
+
+        for method, seconds, peak, row_bytes in [
+            ("generate_prompt_df", df_time, df_peak, df_bytes / n),
+            ("PromptSpace table", table_time, table_peak, table_bytes / n),
+            ("PromptSpace render", render_time, render_peak, None),
+        ]:
+            row_bytes = "-" if row_bytes is None else f"{row_bytes:.0f}"
+            print(f"{size:>7} {n:>9} {method:<22} {seconds:>8.3f} {peak / 2**20:>8.1f} {row_bytes:>10}")
+
+if __name__ == "__main__":
+    main()
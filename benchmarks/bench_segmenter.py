@@ -0,0 +1,72 @@
+# to run (from the repository root)
+# python -m benchmarks.bench_segmenter
+#
+# Compares the sentence/citation parsing previously inlined in cli/main.py
+# (regex split, findall per sentence, list membership for references) with
+# cli/segmenter.py on synthetic reports, and checks both give the same output.
+
+import argparse
+import random
+import re
+import time
+
+from cli.segmenter import segment_reports
+
+WORDS = ["democracy", "policy", "the", "Secretary", "of", "State", "U.S.", "e.g.", "Dr.", "reform", "1989", "summit"]
+
+def synthetic_report(rng, sentences=60, sources=200):
+    parts = []
+    for _ in range(sentences):
+        words = rng.choices(WORDS, k=rng.randint(8, 30))
+        citations = "".join(f" [Source: {rng.randrange(sources)}]" for _ in range(rng.randint(0, 3)))
+        parts.append(" ".join(words) + citations + rng.choice([".", "?", ".\n"]))
+    return " ".join(parts)
+
+def legacy_parse(response):
+    responses = []
+    references = []
+    for sentence in re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', response):
+        if sentence.strip():
+            citations = re.findall(r"\[Source: (\d+)\]", sentence)
+            responses.append({
+                "text": sentence.strip(),
+                "citations": {f"Source {citation}": 1.0 for citation in citations}
+            })
+            for citation in citations:
+                reference = f"Source {citation}"
+                if reference not in references:
+                    references.append(reference)
+    return responses, references
+
+def segmenter_parse(segmented):
+    sentences, references = segmented
+    responses = [
+        {"text": s["text"], "citations": {f"Source {c}": 1.0 for c in s["citations"]}}
+        for s in sentences
+    ]
+    return responses, [f"Source {c}" for c in references]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    reports = [synthetic_report(rng) for _ in range(args.reports)]
+    print(f"{len(reports)} reports, {sum(map(len, reports)) / 2**20:.1f} MB of text")
+
+    start = time.perf_counter()
+    legacy = [legacy_parse(report) for report in reports]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    segmented = segment_reports(reports)
+    segmenter_time = time.perf_counter() - start
+
+    assert legacy == [segmenter_parse(s) for s in segmented], "segmenter output differs from legacy parsing"
+    print(f"legacy split/findall: {legacy_time:.2f} s")
+    print(f"segment_reports:      {segmenter_time:.2f} s ({legacy_time / segmenter_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
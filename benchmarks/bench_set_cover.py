@@ -0,0 +1,76 @@
+# to run (from the repository root)
+# python -m benchmarks.bench_set_cover
+#
+# Compares the lazy-greedy select_min_doc_ids in find_fewest_files.py with
+# the previous greedy, which rebuilt the doc -> facts map on every iteration,
+# on synthetic nugget instances, and checks both select the same documents.
+
+import argparse
+import itertools
+import random
+import time
+
+from find_fewest_files import build_doc_to_facts, build_fact_to_docs, select_min_doc_ids
+
+def synthetic_required_facts(rng, facts, docs, max_docs_per_fact=20, or_fraction=0.1):
+    """
+    Required facts in the flatten_facts format; document popularity is skewed
+    so that a few documents cover many facts.
+    """
+    doc_ids = [f"doc_{i}" for i in range(docs)]
+    cum_weights = list(itertools.accumulate(1.0 / (i + 1) ** 0.8 for i in range(docs)))
+    required_facts = []
+    fact_id = 0
+    while fact_id < facts:
+        group = {}
+        for _ in range(rng.randint(2, 3) if rng.random() < or_fraction else 1):
+            k = rng.randint(1, max_docs_per_fact)
+            group[f"fact_{fact_id}"] = list(set(rng.choices(doc_ids, cum_weights=cum_weights, k=k)))
+            fact_id += 1
+        required_facts.append(("OR" if len(group) > 1 else "AND", group))
+    return required_facts
+
+def rescan_greedy(required_facts):
+    """
+    The previous algorithm, with the same first-seen tie-breaking as the lazy one.
+    """
+    fact_to_docs = build_fact_to_docs(required_facts)
+    _, doc_rank = build_doc_to_facts(fact_to_docs)
+    uncovered_facts = set(fact_to_docs.keys())
+    selected_docs = set()
+    while uncovered_facts:
+        doc_to_facts = {}
+        for fact in uncovered_facts:
+            for doc in fact_to_docs[fact]:
+                doc_to_facts.setdefault(doc, set()).add(fact)
+        best_doc = max(doc_to_facts.items(), key=lambda x: (len(x[1]), -doc_rank[x[0]]))[0]
+        selected_docs.add(best_doc)
+        uncovered_facts -= doc_to_facts[best_doc]
+    return selected_docs
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--facts", type=int, default=10000)
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-rescan", action="store_true", help="only time the lazy greedy")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    required_facts = synthetic_required_facts(rng, args.facts, args.docs)
+    print(f"{args.facts} facts, {args.docs} documents")
+
+    start = time.perf_counter()
+    lazy = select_min_doc_ids(required_facts)
+    lazy_time = time.perf_counter() - start
+    print(f"lazy greedy:  {lazy_time:.2f} s, {len(lazy)} documents")
+
+    if not args.skip_rescan:
+        start = time.perf_counter()
+        rescan = rescan_greedy(required_facts)
+        rescan_time = time.perf_counter() - start
+        assert rescan == lazy, "lazy greedy selected different documents"
+        print(f"rescan greedy: {rescan_time:.2f} s, {len(rescan)} documents ({rescan_time / lazy_time:.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# to run (from the repository root)
+# python -m benchmarks.bench_translation_backends
+#
+# Runs HTTPTranslator and AsyncTranslator against a LibreTranslate-style
+# stand-in server on a local ephemeral port (it upper-cases its input after a
+# fixed delay) and checks the translations, connection reuse, the
+# concurrency limit and the endpoint-derived names. Then times
+# translate_with_chunking with one backend call at a time and with several.
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from trans_shell_single_final import pack_chunks, split_text_smart, translate_with_chunking, MAX_CHUNK_SIZE
+from translation_backends import AsyncTranslator, HTTPTranslator
+
+WORDS = ["политика", "реформа", "саммит", "policy", "the", "of", "democracy", "1989", "выборы", "economy"]
+
+class StandInServer(ThreadingHTTPServer):
+    """Upper-cases "q" (a string or a list) after latency seconds; answers 500 to a text containing FAIL"""
+    daemon_threads = True
+
+    def __init__(self, latency=0.0):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.connections = set()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            q = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["q"]
+            time.sleep(server.latency)
+            texts = q if isinstance(q, list) else [q]
+            if any("FAIL" in text for text in texts):
+                self.reply(500, {"error": "stand-in failure"})
+            else:
+                translated = [text.upper() for text in texts]
+                self.reply(200, {"translatedText": translated if isinstance(q, list) else translated[0]})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@contextlib.contextmanager
+def stand_in_server(latency=0.0):
+    server = StandInServer(latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server, f"http://127.0.0.1:{server.server_port}/translate"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def synthetic_text(rng, chars):
+    parts = []
+    size = 0
+    while size < chars:
+        paragraph = " ".join(rng.choices(WORDS, k=rng.randint(20, 200))) + "."
+        parts.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(parts)
+
+def check_http_translator():
+    with stand_in_server() as (server, endpoint):
+        assert HTTPTranslator(endpoint).name == f"http-127-0-0-1-{server.server_port}-translate"
+        assert HTTPTranslator(endpoint + "2").name != HTTPTranslator(endpoint).name, "endpoints share a name"
+        assert HTTPTranslator(endpoint, name="libre").name == "libre"
+
+        translator = HTTPTranslator(endpoint, pool_size=4)
+        assert translator.translate("привет world", "en") == "ПРИВЕТ WORLD"
+        assert translator.translate_batch(["a", "b c"], "en") == ["A", "B C"]
+        try:
+            translator.translate("FAIL", "en")
+        except RuntimeError as e:
+            assert "HTTP 500" in str(e), e
+        else:
+            raise AssertionError("an HTTP 500 did not raise RuntimeError")
+
+        texts = [f"text {i}" for i in range(64)]
+        with ThreadPoolExecutor(4) as pool:
+            translations = list(pool.map(lambda text: translator.translate(text, "en"), texts))
+        assert translations == [text.upper() for text in texts]
+        # Each of the 4 threads holds at most one connection at a time
+        assert len(server.connections) <= 4, f"{len(server.connections)} connections for a pool of 4"
+        translator.close()
+        print(f"HTTPTranslator: {server.requests} requests over {len(server.connections)} connections")
+
+def check_async_translator(latency):
+    with stand_in_server(latency) as (server, endpoint):
+        translator = AsyncTranslator(HTTPTranslator(endpoint, pool_size=4), max_in_flight=4)
+        assert translator.name == HTTPTranslator(endpoint).name
+
+        async def translate_all(texts):
+            return await asyncio.gather(*(translator.translate(text, "en") for text in texts))
+
+        texts = [f"text {i}" for i in range(16)]
+        assert asyncio.run(translate_all(texts)) == [text.upper() for text in texts]
+        assert asyncio.run(translator.translate_batch(["x", "y"], "en")) == ["X", "Y"]
+        assert 1 < server.max_in_flight <= 4, f"{server.max_in_flight} calls ran at once with max_in_flight=4"
+        translator.close()
+        print(f"AsyncTranslator: {server.requests} requests, at most {server.max_in_flight} at once, "
+              f"over {len(server.connections)} connections")
+
+def time_chunked_translation(text, latency, max_in_flight):
+    with stand_in_server(latency) as (server, endpoint):
+        translator = HTTPTranslator(endpoint, pool_size=max_in_flight)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            translated = translate_with_chunking(text, translator, "en", max_in_flight=max_in_flight)
+        elapsed = time.perf_counter() - start
+        translator.close()
+        return translated, elapsed, server.requests
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in server delay per request, in seconds")
+    parser.add_argument("--chars", type=int, default=200000, help="size of the text translated")
+    parser.add_argument("--max-in-flight", type=int, default=4, help="concurrent calls compared with one at a time")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    check_http_translator()
+    check_async_translator(args.latency)
+
+    text = synthetic_text(random.Random(args.seed), args.chars)
+    expected = " ".join(chunk.upper() for chunk in pack_chunks(split_text_smart(text, MAX_CHUNK_SIZE), MAX_CHUNK_SIZE))
+    sequential, sequential_time, calls = time_chunked_translation(text, args.latency, 1)
+    concurrent, concurrent_time, _ = time_chunked_translation(text, args.latency, args.max_in_flight)
+    assert sequential == expected, "translate_with_chunking output differs from the upper-cased chunks"
+    assert concurrent == sequential, f"max_in_flight={args.max_in_flight} changed the translation"
+    print(f"translate_with_chunking on {len(text)} characters ({calls} calls, {args.latency * 1000:.0f} ms each):")
+    print(f"  max_in_flight=1: {sequential_time:.2f} s")
+    print(f"  max_in_flight={args.max_in_flight}: {concurrent_time:.2f} s ({sequential_time / concurrent_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
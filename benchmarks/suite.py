@@ -0,0 +1,186 @@
+# to run (from the repository root)
+# python -m benchmarks.suite --output results.json
+# python -m benchmarks.suite --quick --baseline results.json
+#
+# Times the pipeline's CPU hot paths on seeded synthetic data and records the
+# best-of-N wall time and the tracemalloc peak of each. Results can be written
+# as JSON and compared against an earlier run; the exit status is 1 if any
+# benchmark got slower (or hungrier) than the baseline by more than the
+# tolerance.
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.bench_prompt_generator import BACKGROUND, QUERY, synthetic_instructions
+from benchmarks.bench_segmenter import synthetic_report
+from benchmarks.bench_set_cover import synthetic_required_facts
+from cli.context_parser import extract_titles_passages
+from cli.prompt_generator import generate_prompt_df, generate_prompt_space
+from cli.segmenter import segment_reports
+from find_fewest_files import select_min_doc_ids
+from trans_shell_single_final import split_text_smart
+
+# Sizes per benchmark: (quick, full)
+SIZES = {
+    "generate_prompt_df": ([2], [1, 2]),
+    "PromptSpace.to_df": ([2], [2, 3]),
+    "split_text_smart": ([1], [1, 8]),
+    "extract_titles_passages": ([1], [1, 8]),
+    "select_min_doc_ids": ([2000], [2000, 10000]),
+    "segment_reports": ([500], [500, 5000]),
+}
+
+WORDS = ["политика", "реформа", "саммит", "policy", "the", "of", "State", "democracy", "1989", "Украина", "выборы", "economy"]
+
+def synthetic_document(rng, megabytes):
+    """Scraped-article-like text: sentences in paragraphs separated by blank lines or runs of spaces"""
+    parts = []
+    size = 0
+    while size < megabytes * 2**20:
+        sentences = [" ".join(rng.choices(WORDS, k=rng.randint(5, 40))) + rng.choice([".", "!", "?"])
+                     for _ in range(rng.randint(1, 12))]
+        paragraph = " ".join(sentences)
+        parts.append(paragraph)
+        parts.append(rng.choice(["\n\n", "    ", "\n \n"]))
+        size += len(paragraph) + 2
+    return "".join(parts)
+
+def synthetic_context(rng, megabytes):
+    """A research context in the Source/Title/Content layout, plus a doc_dict covering half of its sources"""
+    parts = []
+    doc_dict = {}
+    size = 0
+    i = 0
+    while size < megabytes * 2**20:
+        url = f"https://example.org/article/{i}"
+        if i % 2 == 0:
+            doc_dict[url] = f"doc_{i}"
+        title = " ".join(rng.choices(WORDS, k=rng.randint(3, 10)))
+        passage = "\n".join(" ".join(rng.choices(WORDS, k=rng.randint(10, 30))) + "." for _ in range(rng.randint(2, 8)))
+        record = f"Source: {url}\nTitle: {title}\nContent: {passage}\n\n"
+        parts.append(record)
+        size += len(record)
+        i += 1
+    return "".join(parts), doc_dict
+
+def setup_generate_prompt_df(rng, size):
+    instructions = synthetic_instructions(size)
+    return lambda: generate_prompt_df(QUERY, BACKGROUND, instructions), {"options": size}
+
+def setup_prompt_space_to_df(rng, size):
+    space = generate_prompt_space(QUERY, BACKGROUND, synthetic_instructions(size))
+    indices = range(len(space))
+    return lambda: space.to_df(indices, prompt_text=False), {"options": size, "variants": len(space)}
+
+def setup_split_text_smart(rng, size):
+    text = synthetic_document(rng, size)
+    return lambda: split_text_smart(text), {"megabytes": size}
+
+def setup_extract_titles_passages(rng, size):
+    context, doc_dict = synthetic_context(rng, size)
+    return lambda: extract_titles_passages(context, doc_dict), {"megabytes": size}
+
+def setup_select_min_doc_ids(rng, size):
+    required_facts = synthetic_required_facts(rng, size, size * 10)
+    return lambda: select_min_doc_ids(required_facts), {"facts": size, "docs": size * 10}
+
+def setup_segment_reports(rng, size):
+    reports = [synthetic_report(rng) for _ in range(size)]
+    return lambda: segment_reports(reports), {"reports": size}
+
+BENCHMARKS = {
+    "generate_prompt_df": setup_generate_prompt_df,
+    "PromptSpace.to_df": setup_prompt_space_to_df,
+    "split_text_smart": setup_split_text_smart,
+    "extract_titles_passages": setup_extract_titles_passages,
+    "select_min_doc_ids": setup_select_min_doc_ids,
+    "segment_reports": setup_segment_reports,
+}
+
+def run_benchmark(fn, repeat):
+    """Best wall time over repeat runs, then the tracemalloc peak of one more run"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def run_suite(names, quick=False, repeat=3, seed=0):
+    results = []
+    for name in names:
+        for size in SIZES[name][0 if quick else 1]:
+            fn, params = BENCHMARKS[name](random.Random(seed), size)
+            seconds, peak = run_benchmark(fn, repeat)
+            results.append({"name": name, "params": params, "seconds": seconds, "peak_mb": peak / 2**20})
+            print(f"{result_key(results[-1]):<45} {seconds:>9.4f} s {peak / 2**20:>9.1f} MB", flush=True)
+    return results
+
+def result_key(result):
+    return result["name"] + "[" + ",".join(f"{k}={v}" for k, v in result["params"].items()) + "]"
+
+def compare(results, baseline, tolerance):
+    """Print each result against the baseline run; returns the keys that regressed"""
+    previous = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+    print(f"\n{'benchmark':<45} {'time':>8} {'memory':>8}")
+    for result in results:
+        key = result_key(result)
+        if key not in previous:
+            print(f"{key:<45} {'new':>8} {'new':>8}")
+            continue
+        time_ratio = result["seconds"] / max(previous[key]["seconds"], 1e-9)
+        memory_ratio = result["peak_mb"] / max(previous[key]["peak_mb"], 1e-9)
+        regressed = time_ratio > 1 + tolerance or memory_ratio > 1 + tolerance
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<45} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--quick", action="store_true", help="only the smallest sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark; the best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before a result counts as a regression")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    names = args.names or list(BENCHMARKS)
+    results = run_suite(names, quick=args.quick, repeat=args.repeat, seed=args.seed)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "quick": args.quick,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
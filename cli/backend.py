@@ -0,0 +1,54 @@
+import functools
+import json
+
+class LiveBackend:
+    """
+    GPTResearcher, its generic_prompt_call and the Argue-Eval judge.
+
+    Each is imported on first use, so e.g. research-only runs do not need
+    argue_eval installed.
+    """
+    name = "live"
+
+    @property
+    def GPTResearcher(self):
+        from gpt_researcher import GPTResearcher
+        return GPTResearcher
+
+    @property
+    def generic_prompt_call(self):
+        from gpt_researcher.utils.llm import generic_prompt_call
+        return generic_prompt_call
+
+    @property
+    def get_trec_format(self):
+        from gpt_researcher.utils import output
+        return output.get_trec_format
+
+    @property
+    def evaluate_report(self):
+        from argue_eval.judge import evaluate_report
+        return evaluate_report
+
+@functools.lru_cache(maxsize=None)
+def load_backend(config_file=None):
+    """
+    Return the backend named by the "backend" key of config_file.
+
+    "mock" selects the offline stand-ins in mock_backend, configured by the
+    config's "mock" section; anything else (or no config) is the live
+    backend. One backend is shared per config file, so mock latencies are
+    drawn from one seeded stream and all calls land in the same spans.
+    """
+    config = {}
+    if config_file is not None:
+        with open(config_file, "r") as f:
+            config = json.load(f)
+    if config.get("backend") != "mock":
+        return LiveBackend()
+    # cli modules are imported flat when run from cli/ and as cli.* from the repository root
+    if __package__:
+        from .mock_backend import MockBackend
+    else:
+        from mock_backend import MockBackend
+    return MockBackend(config.get("mock"))
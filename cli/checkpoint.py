@@ -0,0 +1,44 @@
+import json
+import os
+
+def iter_requests(input_file):
+    """
+    Yield requests from a JSONL file one line at a time.
+    """
+    with open(input_file, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+class Checkpoint:
+    """
+    Manifest of completed (request_id, prompt_id) pairs for resumable runs.
+
+    Every finished unit of work is appended to the manifest as one JSON line
+    and flushed, so an interrupted run loses at most the units in progress.
+    With resume=False the manifest is started over.
+    """
+    def __init__(self, manifest_path, resume=True):
+        self.manifest_path = manifest_path
+        self.done = set()
+        if resume and os.path.exists(manifest_path):
+            with open(manifest_path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by a crash; that unit is simply redone.
+                        continue
+                    self.done.add((entry["request_id"], entry["prompt_id"]))
+        self.file = open(manifest_path, "a" if resume else "w")
+
+    def is_done(self, request_id, prompt_id=None):
+        return (request_id, prompt_id) in self.done
+
+    def mark_done(self, request_id, prompt_id=None):
+        self.done.add((request_id, prompt_id))
+        self.file.write(json.dumps({"request_id": request_id, "prompt_id": prompt_id}) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+# cli modules are imported flat when run from cli/ and as cli.* from the repository root
+if __package__:
+    from . import metrics
+else:
+    import metrics
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
+
+    Allows `rate` acquisitions per second on average with bursts of up to
+    `capacity`; waiters are served in arrival order.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+async def run_pipeline(items, produce, consume, produce_limit, consume_limit, queue_size=None, rate_limiter=None, return_exceptions=False):
+    """
+    Two-stage producer/consumer pipeline.
+
+    Every item goes through produce(item) and, as soon as that finishes,
+    consume(item, produced). Each stage has its own concurrency limit and the
+    bounded queue between them stalls producers when consumers fall behind.
+    An item that fails in either stage does not stop the others: the pipeline
+    drains and the first error is raised once every item has finished, or,
+    with return_exceptions=True, the exception takes the item's place in the
+    results (an item whose produce failed is not consumed).
+    Items waiting for a produce slot and produced items waiting for a consumer
+    are reported as the "generate" and "judge" queue depths in metrics.
+    Returns (produced, consumed) lists in the order of items.
+    """
+    items = list(items)
+    produced = [None] * len(items)
+    consumed = [None] * len(items)
+    errors = []
+    queue = asyncio.Queue(maxsize=queue_size or consume_limit)
+    semaphore = asyncio.Semaphore(produce_limit)
+    waiting = len(items)
+    metrics.set_gauge("scale_queue_depth", waiting, queue="generate")
+
+    async def producer(i):
+        nonlocal waiting
+        async with semaphore:
+            waiting -= 1
+            metrics.set_gauge("scale_queue_depth", waiting, queue="generate")
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            try:
+                produced[i] = await produce(items[i])
+            except Exception as e:
+                produced[i] = consumed[i] = e
+                errors.append(e)
+                return
+            await queue.put(i)
+            metrics.set_gauge("scale_queue_depth", queue.qsize(), queue="judge")
+
+    async def consumer():
+        while True:
+            i = await queue.get()
+            metrics.set_gauge("scale_queue_depth", queue.qsize(), queue="judge")
+            try:
+                consumed[i] = await consume(items[i], produced[i])
+            except Exception as e:
+                consumed[i] = e
+                errors.append(e)
+            finally:
+                queue.task_done()
+
+    consumers = [asyncio.create_task(consumer()) for _ in range(consume_limit)]
+    try:
+        await asyncio.gather(*(producer(i) for i in range(len(items))))
+        await queue.join()
+    finally:
+        for task in consumers:
+            task.cancel()
+        await asyncio.gather(*consumers, return_exceptions=True)
+    if errors and not return_exceptions:
+        raise errors[0]
+    return produced, consumed
@@ -0,0 +1,64 @@
+import re
+
+# Field markers are matched at the start of a line, so a passage whose body
+# mentions "Source:" or "Content:" is not cut apart. Contexts whose records
+# are not on separate lines fall back to matching the markers anywhere.
+SOURCE_PATTERN = re.compile(r"^Source:", re.M)
+CONTENT_PATTERN = re.compile(r"^Content:", re.M)
+ANY_SOURCE_PATTERN = re.compile(r"Source:")
+
+def _record_starts(context):
+    pattern = SOURCE_PATTERN if '\nSource:' in context else ANY_SOURCE_PATTERN
+    for match in pattern.finditer(context):
+        yield match.end()
+
+def _flatten(text):
+    return text.replace('\n', ' ').strip()
+
+def _parse_record(context, start, end, doc_dict):
+    content = CONTENT_PATTERN.search(context, start, end)
+    if content is not None:
+        content_start, content_end = content.span()
+    else:
+        content_start = context.find('Content:', start, end)
+        if content_start < 0:
+            return None
+        content_end = content_start + len('Content:')
+
+    title_start = context.find('Title:', start, content_start)
+    if title_start >= 0:
+        docid = _flatten(context[start:title_start])
+        title = _flatten(context[title_start + len('Title:'):content_start])
+    else:
+        docid = _flatten(context[start:content_start])
+        title = ""
+
+    if docid in doc_dict:
+        docid = doc_dict[docid]
+    passage = _flatten(context[content_end:end])
+    return {'docid': docid.strip(), 'title': title, 'passage': passage}
+
+def iter_titles_passages(context, doc_dict):
+    """
+    Yield {'docid', 'title', 'passage'} records from a research context.
+
+    The context is scanned once; only the fields of each record are copied
+    out. Records without a "Content:" field are skipped.
+    """
+    start = None
+    for next_start in _record_starts(context):
+        if start is not None:
+            record = _parse_record(context, start, next_start - len('Source:'), doc_dict)
+            if record is not None:
+                yield record
+        start = next_start
+    if start is not None:
+        record = _parse_record(context, start, len(context), doc_dict)
+        if record is not None:
+            yield record
+
+def extract_titles_passages(context, doc_dict):
+    """
+    Extract the cited passages from a research context.
+    """
+    return list(iter_titles_passages(context, doc_dict))
@@ -1,8 +1,47 @@
-from argue_eval.judge import evaluate_report
 from pathlib import Path
 
-async def run_evaluation(report, nuggets_path, provider="hltcoe_local"):
+# cli modules are imported flat when run from cli/ and as cli.* from the repository root
+if __package__:
+    from . import tracing
+    from .backend import load_backend
+else:
+    import tracing
+    from backend import load_backend
+
+async def run_evaluation(report, nuggets_path, provider="hltcoe_local", backend=None):
+    """
+    Evaluate report using Argue-Eval (or backend's judge).
+    """
+    backend = backend or load_backend()
+    with tracing.span("evaluation", report["metadata"]["topic_id"], bytes_in=tracing.num_bytes(report)) as span:
+        result = await backend.evaluate_report(report, Path(nuggets_path), provider)
+        span.set(bytes_out=tracing.num_bytes(result))
+    return result
+
+class EvaluatorSession:
     """
-    Evaluate report using Argue-Eval.
+    Evaluate many reports against per-topic nuggets files.
+
+    nuggets_paths maps topic_id to a nuggets JSON file. The session only
+    validates paths: they are resolved and checked up front, so a missing
+    file fails before any report is generated. The judge receives the same
+    Path that run_evaluation passes it and reads the file itself on every
+    evaluation. The judge is Argue-Eval's unless another backend is given.
     """
-    return await evaluate_report(report, Path(nuggets_path), provider)
\ No newline at end of file
+    def __init__(self, nuggets_paths, provider="hltcoe_local", backend=None):
+        self.provider = provider
+        self.evaluate_report = (backend or load_backend()).evaluate_report
+        self.nuggets = {}
+        for topic_id, nuggets_path in nuggets_paths.items():
+            nuggets_path = Path(nuggets_path).resolve()
+            if not nuggets_path.is_file():
+                raise FileNotFoundError(f"nuggets file for topic {topic_id} not found: {nuggets_path}")
+            self.nuggets[topic_id] = nuggets_path
+
+    async def evaluate(self, report, topic_id=None):
+        if topic_id is None:
+            topic_id = report["metadata"]["topic_id"]
+        with tracing.span("evaluation", topic_id, bytes_in=tracing.num_bytes(report)) as span:
+            result = await self.evaluate_report(report, self.nuggets[topic_id], self.provider)
+            span.set(bytes_out=tracing.num_bytes(result))
+        return result
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+DEFAULT_MAX_ENTRIES = 100000
+
+class LLMCache:
+    """
+    SQLite-backed cache of LLM responses.
+
+    Responses are keyed by a hash of the model config file, the call step and
+    the full prompt text. Rows older than ttl seconds count as misses and the
+    least recently used rows beyond max_entries are evicted. bypass=True turns
+    every lookup into a miss and skips writes, for sampling runs where the
+    same prompt is expected to give a different answer.
+    """
+    def __init__(self, db_path, config_file, max_entries=DEFAULT_MAX_ENTRIES, ttl=None, bypass=False):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        with open(config_file, "rb") as f:
+            self.config_hash = hashlib.sha256(f.read()).hexdigest()
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.conn.commit()
+
+    def key(self, step, prompt):
+        digest = hashlib.sha256()
+        for part in (self.config_hash, step, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Return the cached response for key, or None on a miss.
+        """
+        if self.bypass:
+            self.misses += 1
+            return None
+        now = time.time()
+        row = self.conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.conn.commit()
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, response):
+        if self.bypass:
+            return
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (key, response, created, accessed) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(response), now, now)
+        )
+        self.conn.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self.conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        self.conn.close()
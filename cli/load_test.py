@@ -0,0 +1,176 @@
+# to run (from cli/)
+# python load_test.py --requests 200 --concurrency 16
+# python load_test.py --mode prompts --prompts 200 --max-in-flight 8 --judges 4
+#
+# Drives the orchestration against the mock backend (mock_config.json, or any
+# config with "backend": "mock") and reports throughput, per-stage tail latency
+# and utilization of the orchestration code alone.
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+import time
+
+import tracing
+import metrics
+from backend import load_backend
+from main import research_prompt_report_eval
+from report_generator import write_reports
+from trace_analyzer import percentile
+
+QUERY = "I need a report about Condoleezza Rice that focuses on her time in public service."
+BACKGROUND = "I am a high school student writing a report about influential women in politics."
+REPORT_TYPE = "SCALE25_report"
+
+def latency_summary(values):
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+def stage_summary(spans, wall, limits):
+    """
+    Per-stage latency and utilization: busy time over wall time times the
+    number of slots the orchestration allows that stage.
+    """
+    stages = {}
+    for stage in sorted({span["stage"] for span in spans}):
+        durations = [span["end"] - span["start"] for span in spans if span["stage"] == stage]
+        summary = latency_summary(durations)
+        summary["failures"] = sum(1 for span in spans if span["stage"] == stage and not span["ok"])
+        summary["utilization"] = sum(durations) / (wall * limits[stage]) if stage in limits else None
+        stages[stage] = summary
+    return stages
+
+async def load_test_reports(config_file, num_requests, concurrency, timeout=None):
+    """
+    Push synthetic requests through report_generator.write_reports; request
+    latency runs from the moment a request is read to the end of its last call.
+    Requests that fail (see "failure_rate" in the mock config) are counted
+    from the errors write_reports logs.
+    """
+    backend = load_backend(config_file)
+    read_at = {}
+
+    def requests():
+        for i in range(num_requests):
+            d = {"request_id": f"load-{i}", "problem_statement": f"{QUERY} ({i})", "background": BACKGROUND}
+            read_at[d["problem_statement"]] = time.perf_counter()
+            yield d
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        output_file = os.path.join(tmp, "reports.jsonl")
+        await write_reports(output_file, requests(), config_file, REPORT_TYPE,
+                            concurrency=concurrency, timeout=timeout, ordered=False)
+        wall = time.perf_counter() - start
+        with open(output_file + ".log", "r") as f:
+            failed = {d["problem_statement"] for d in map(json.loads, f) if "error" in d}
+
+    finished = {}
+    for span in backend.spans:
+        if span["stage"] == "write" and span["key"] not in failed:
+            finished[span["key"]] = span["end"]
+    latencies = [finished[query] - read_at[query] for query in finished]
+    return {
+        "mode": "reports",
+        "wall_seconds": wall,
+        "completed": len(finished),
+        "failed": len(failed),
+        "per_minute": len(finished) / wall * 60,
+        "latency": latency_summary(latencies),
+        "stages": stage_summary(backend.spans, wall, {"research": concurrency, "write": concurrency}),
+    }
+
+async def load_test_prompts(config_file, num_prompts, max_in_flight, max_judges_in_flight, instruction_json):
+    """
+    Push sampled prompt variants through main.research_prompt_report_eval
+    (generation feeding the judges); prompts that fail in either stage are
+    counted from its "error" column.
+    """
+    backend = load_backend(config_file)
+    with tempfile.TemporaryDirectory() as tmp:
+        nuggets_path = os.path.join(tmp, "nuggets.json")
+        with open(nuggets_path, "w") as f:
+            json.dump({}, f)
+        start = time.perf_counter()
+        results = await research_prompt_report_eval(
+            QUERY, BACKGROUND, REPORT_TYPE,
+            num_to_generate=num_prompts,
+            max_in_flight=max_in_flight,
+            max_judges_in_flight=max_judges_in_flight,
+            config_path=config_file,
+            instruction_json=instruction_json,
+            nuggets_path=nuggets_path
+        )
+        wall = time.perf_counter() - start
+    failed = int(results["error"].notna().sum())
+    return {
+        "mode": "prompts",
+        "wall_seconds": wall,
+        "completed": len(results) - failed,
+        "failed": failed,
+        "per_minute": (len(results) - failed) / wall * 60,
+        "stages": stage_summary(backend.spans, wall, {"llm": max_in_flight, "judge": max_judges_in_flight}),
+    }
+
+def print_summary(summary):
+    def fmt(value):
+        return "-" if value is None else f"{value:.3f}"
+
+    print(f"{summary['completed']} {summary['mode']} in {summary['wall_seconds']:.1f} s "
+          f"({summary['per_minute']:.1f} per minute), {summary['failed']} failed")
+    if "latency" in summary:
+        latency = summary["latency"]
+        print(f"request latency (s): p50 {fmt(latency['p50'])}  p95 {fmt(latency['p95'])}  "
+              f"p99 {fmt(latency['p99'])}  max {fmt(latency['max'])}")
+    print(f"{'stage':<14} {'calls':>6} {'fail':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'util':>6}")
+    for stage, s in summary["stages"].items():
+        utilization = "-" if s["utilization"] is None else f"{s['utilization']:.0%}"
+        print(f"{stage:<14} {s['count']:>6} {s['failures']:>5} {fmt(s['p50']):>8} {fmt(s['p95']):>8} {fmt(s['p99']):>8} {utilization:>6}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", default="mock_config.json", help='config file with "backend": "mock"')
+    parser.add_argument("--mode", choices=["reports", "prompts"], default="reports",
+                        help="report_generator.write_reports, or main.research_prompt_report_eval")
+    parser.add_argument("--requests", type=int, default=100, help="requests for --mode reports")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests researched at once")
+    parser.add_argument("--timeout", type=float, default=None, help="per-request timeout in seconds")
+    parser.add_argument("--prompts", type=int, default=100, help="prompt variants for --mode prompts")
+    parser.add_argument("--max-in-flight", type=int, default=8, help="generation calls at once")
+    parser.add_argument("--judges", type=int, default=4, help="evaluations at once")
+    parser.add_argument("--instructions", default=os.path.join("..", "instruction_sets.json"))
+    parser.add_argument("--output", help="also write the summary to this JSON file")
+    parser.add_argument("--trace", help="also write orchestration spans to this JSONL file (see trace_analyzer.py)")
+    parser.add_argument("--metrics-port", type=int, default=None, help="serve live Prometheus-text metrics on this local port")
+    args = parser.parse_args()
+
+    if load_backend(args.config).name != "mock":
+        parser.error(f'{args.config} does not select "backend": "mock"')
+
+    # Appending to an existing trace keeps earlier runs apart in trace_analyzer.py
+    tracer = tracing.configure(args.trace, run_id=f"load-test-{args.mode}-{time.strftime('%Y-%m-%d_%H-%M-%S')}-{os.getpid()}")
+    if args.metrics_port is not None:
+        metrics.serve(args.metrics_port)
+    # The pipeline prints every report and judgment; keep that out of the summary.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if args.mode == "reports":
+            summary = asyncio.run(load_test_reports(args.config, args.requests, args.concurrency, args.timeout))
+        else:
+            summary = asyncio.run(load_test_prompts(args.config, args.prompts, args.max_in_flight, args.judges, args.instructions))
+
+    tracer.close()
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
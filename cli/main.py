@@ -1,128 +1,178 @@
 import asyncio
 import pandas as pd
 import json
-import re
 from datetime import datetime
 
 from config_loader import load_config, load_instructions
-from prompt_generator import generate_prompt_df
+from prompt_generator import generate_prompt_space
 from report_generator import CustomLogsHandler
-from report_generator import extract_titles_passages
-from gpt_researcher import GPTResearcher
-from gpt_researcher.utils.llm import generic_prompt_call
-from evaluator import run_evaluation
+import tracing
+import metrics
+from backend import load_backend
+from evaluator import EvaluatorSession
+from concurrency import TokenBucket, run_pipeline
+from llm_cache import LLMCache
+from segmenter import segment_report
 
 CONFIG_PATH = "./config.dawn.Llama-3.3-70B-Instruct.json"
 INSTRUCTION_JSON = "instruction_sets.json"
 NUGGETS_PATH = "/home/hltcoe/slineberger/workspace/generation/argue-eval/data/nuggets/sample_nuggets_388.json"
+LLM_CACHE_PATH = "llm_cache.sqlite"
+LLM_CACHE_BYPASS = False  # set for sampling runs (temperature > 0)
+MAX_IN_FLIGHT = 8
+MAX_JUDGES_IN_FLIGHT = 4
+REQUESTS_PER_SECOND = None
+TRACE_PATH = None  # e.g. "trace.jsonl"; summarize with trace_analyzer.py
+METRICS_PORT = None  # e.g. 9100 to serve live metrics at http://127.0.0.1:9100/metrics
+
+def pretty_print_response(response_dict):
+    formatted = json.dumps(response_dict, indent=2)
+    if "responses" in response_dict:
+        formatted = formatted.replace('}, {', '},\n{')
+    return formatted
+
+def parse_response(response, topic_id):
+    """
+    Split a generated report into cited sentences in the Argue-Eval report format.
+    """
+    try:
+        response_dict = {
+            "metadata": {
+                "team_id": "scott's prompt team",
+                "run_id": datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+                "topic_id": topic_id
+            },
+            "responses": [],
+            "references": []
+        }
+
+        sentences, references = segment_report(response)
+        for sentence in sentences:
+            response_dict["responses"].append({
+                "text": sentence["text"],
+                "citations": {f"Source {citation}": 1.0 for citation in sentence["citations"]}
+            })
+        response_dict["references"] = [f"Source {citation}" for citation in references]
+
+    except Exception as e:
+        print(f"Error processing response for prompt {topic_id}: {e}")
+        response_dict = {
+            "metadata": {"team_id": "unknown", "run_id": "unknown", "topic_id": topic_id},
+            "responses": [],
+            "references": []
+        }
+    return response_dict
+
+async def generate_report(row, researcher, llm_cache=None, prompt_call=None):
+    print(f"\nGenerating report for prompt {row['id']}:")
+    with tracing.span("generate", prompt_id=row["id"], bytes_in=tracing.num_bytes(row["prompt_text"])) as span:
+        response = None
+        if llm_cache is not None:
+            cache_key = llm_cache.key("relevance", row["prompt_text"])
+            response = llm_cache.get(cache_key)
+        span.set(cache_hit=None if llm_cache is None else response is not None)
+        if response is None:
+            if prompt_call is None:
+                prompt_call = load_backend().generic_prompt_call
+            response = await prompt_call(
+                agent_role_prompt=None,
+                user_prompt=row["prompt_text"],
+                cfg=researcher.cfg,
+                websocket=researcher.websocket,
+                cost_callback=researcher.add_costs,
+                step="relevance"
+            )
+            if llm_cache is not None:
+                llm_cache.put(cache_key, response)
+        span.set(bytes_out=tracing.num_bytes(response))
+    print(f"Raw response for prompt {row['id']}:\n{response}")
+
+    response_dict = parse_response(response, row["id"])
+    print(pretty_print_response(response_dict))
+    return response_dict
+
+async def evaluate_generated_report(evaluator, row, report):
+    print(f"Validated report: {json.dumps(report, indent=2)}")
+    result = await evaluator.evaluate(report, row["id"])
+
+    for segment in result["segments"]:
+        text = segment["text"]
+        judgments = segment["judgments"]
+        print(f"Text: {text}")
+        for judgment in judgments:
+            print(f"  Judgment Type: {judgment['judgment_type_id']}")
+            print(f"  Response: {judgment['response']}")
+            print(f"  Evaluator: {judgment['evaluator']}")
+
+        for response in report["responses"]:
+            response["scores"] = [
+                {
+                    "judgment_type": "example_judgment",
+                    "response": {"example_key": "example_value"},
+                    "evaluator": "example_evaluator"
+                }
+            ]
+    return result
 
 async def research_prompt_report_eval(
     query: str,
     background: str,
     report_type: str,
-    num_to_generate: int = 5
+    num_to_generate: int = 5,
+    max_in_flight: int = MAX_IN_FLIGHT,
+    requests_per_second: float = REQUESTS_PER_SECOND,
+    max_judges_in_flight: int = MAX_JUDGES_IN_FLIGHT,
+    queue_size: int = None,
+    llm_cache: LLMCache = None,
+    config_path: str = CONFIG_PATH,
+    instruction_json: str = INSTRUCTION_JSON,
+    nuggets_path: str = NUGGETS_PATH
 ) -> pd.DataFrame:
-    instructions = load_instructions(INSTRUCTION_JSON)
-    prompt_df = generate_prompt_df(query, background, instructions)
-    print(f"Total prompts generated: {len(prompt_df)}")
-    selected_prompts = prompt_df.sample(n=min(num_to_generate, len(prompt_df)), random_state=42)
+    """
+    Generate reports for sampled prompt variants and score them with Argue-Eval.
+
+    Generation and evaluation run as a pipeline: each report is queued for a
+    judge as soon as it is written. Up to max_in_flight generation calls
+    (optionally throttled to requests_per_second) and max_judges_in_flight
+    evaluations run at once; results keep the order of the sampled prompts.
+    A prompt whose generation or evaluation fails does not stop the others:
+    its results are None and the "error" column says what went wrong.
+    Responses for prompts already in llm_cache are not regenerated. The
+    researcher, LLM call and judge come from the backend config_path selects.
+    """
+    backend = load_backend(config_path)
+    instructions = load_instructions(instruction_json)
+    prompt_space = generate_prompt_space(query, background, instructions)
+    print(f"Total prompt variants: {len(prompt_space)}")
+    selected_prompts = prompt_space.sample(num_to_generate, random_state=42)
 
     custom_logs_handler = CustomLogsHandler()
-    researcher = GPTResearcher(query, background, report_type, websocket=custom_logs_handler, config_path=CONFIG_PATH)
-
-    reports = []
-    for idx, row in selected_prompts.iterrows():
-        print(f"\nGenerating report for prompt {row['id']}:")
-        prompt_text = row["prompt_text"]
-        response = await generic_prompt_call(
-            agent_role_prompt=None,
-            user_prompt=prompt_text,
-            cfg=researcher.cfg,
-            websocket=researcher.websocket,
-            cost_callback=researcher.add_costs,
-            step="relevance"
-        )
-        print(f"Raw response for prompt {row['id']}:\n{response}")
-
-        try:
-            response_dict = {
-                "metadata": {
-                    "team_id": "scott's prompt team",
-                    "run_id": datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
-                    "topic_id": row["id"]
-                },
-                "responses": [],
-                "references": []
-            }
-
-            citation_pattern = r"\[Source: (\d+)\]"
-            sentences = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s', response)
-            for sentence in sentences:
-                if sentence.strip():
-                    citations = re.findall(citation_pattern, sentence)
-                    response_dict["responses"].append({
-                        "text": sentence.strip(),
-                        "citations": {f"Source {citation}": 1.0 for citation in citations}
-                    })
-                    for citation in citations:
-                        reference = f"Source {citation}"
-                        if reference not in response_dict["references"]:
-                            response_dict["references"].append(reference)
-
-        except Exception as e:
-            print(f"Error processing response for prompt {row['id']}: {e}")
-            response_dict = {
-                "metadata": {"team_id": "unknown", "run_id": "unknown", "topic_id": row["id"]},
-                "responses": [],
-                "references": []
-            }
-
-        reports.append(response_dict)
-
-        def pretty_print_response(response_dict):
-            formatted = json.dumps(response_dict, indent=2)
-            if "responses" in response_dict:
-                formatted = formatted.replace('}, {', '},\n{')
-            return formatted
-
-        formatted_report_with_line_breaks = pretty_print_response(response_dict)
-        print(formatted_report_with_line_breaks)
-
-    selected_prompts["generated_report"] = reports
-
-    argue_eval_results = []
-    for report in selected_prompts["generated_report"]:
-        print(f"Validated report: {json.dumps(report, indent=2)}")
-        result = await run_evaluation(
-            report,
-            NUGGETS_PATH,
-            provider="hltcoe_local"
-        )
-        argue_eval_results.append(result)
-
-        team_id = result["team_id"]
-        topic_id = result["topic_id"]
-        run_id = result["run_id"]
-
-        for segment in result["segments"]:
-            text = segment["text"]
-            judgments = segment["judgments"]
-            print(f"Text: {text}")
-            for judgment in judgments:
-                print(f"  Judgment Type: {judgment['judgment_type_id']}")
-                print(f"  Response: {judgment['response']}")
-                print(f"  Evaluator: {judgment['evaluator']}")
-
-            for response in report["responses"]:
-                response["scores"] = [
-                    {
-                        "judgment_type": "example_judgment",
-                        "response": {"example_key": "example_value"},
-                        "evaluator": "example_evaluator"
-                    }
-                ]
-
-    selected_prompts["argue_eval"] = argue_eval_results
+    researcher = metrics.track_costs(backend.GPTResearcher(query, background, report_type, websocket=custom_logs_handler, config_path=config_path))
+
+    # Every sampled prompt is judged against the same nuggets file; its path is checked before any generation.
+    evaluator = EvaluatorSession({prompt_id: nuggets_path for prompt_id in selected_prompts["id"]}, provider="hltcoe_local", backend=backend)
+    rate_limiter = TokenBucket(requests_per_second) if requests_per_second else None
+    reports, argue_eval_results = await run_pipeline(
+        [row for _, row in selected_prompts.iterrows()],
+        lambda row: generate_report(row, researcher, llm_cache, backend.generic_prompt_call),
+        lambda row, report: evaluate_generated_report(evaluator, row, report),
+        max_in_flight,
+        max_judges_in_flight,
+        queue_size=queue_size,
+        rate_limiter=rate_limiter,
+        return_exceptions=True
+    )
+
+    errors = [
+        f"{type(result).__name__}: {result}" if isinstance(result, Exception) else None
+        for result in argue_eval_results
+    ]
+    for prompt_id, error in zip(selected_prompts["id"], errors):
+        if error is not None:
+            print(f"Prompt {prompt_id} failed: {error}")
+    selected_prompts["generated_report"] = [None if isinstance(report, Exception) else report for report in reports]
+    selected_prompts["argue_eval"] = [None if error is not None else result for result, error in zip(argue_eval_results, errors)]
+    selected_prompts["error"] = errors
     return selected_prompts
 
 def main():
@@ -130,14 +180,29 @@ def main():
     background = "I am a high school student writing a report for an assignment about influential women in politics that will focus on Condoleezza Rice."
     report_type = "SCALE25_report2"
 
-    results_df = asyncio.run(
-        research_prompt_report_eval(
-            query=query,
-            background=background,
-            report_type=report_type,
-            num_to_generate=1
+    llm_cache = LLMCache(LLM_CACHE_PATH, CONFIG_PATH, bypass=LLM_CACHE_BYPASS)
+    tracer = tracing.configure(TRACE_PATH)
+    if METRICS_PORT is not None:
+        metrics.serve(METRICS_PORT)
+    try:
+        results_df = asyncio.run(
+            research_prompt_report_eval(
+                query=query,
+                background=background,
+                report_type=report_type,
+                num_to_generate=1,
+                llm_cache=llm_cache
+            )
         )
-    )
+    except Exception:
+        metrics.inc("scale_requests_total", status="failed")
+        raise
+    # The query is one request; it failed if any of its prompts did
+    status = "failed" if results_df["error"].notna().any() else "completed"
+    metrics.inc("scale_requests_total", status=status)
+    print(f"LLM cache: {llm_cache.stats()}")
+    llm_cache.close()
+    tracer.close()
     results_df.to_csv("reports_with_argue_eval3.csv", index=False)
     print("Saved results to reports_with_argue_eval3.csv")
 
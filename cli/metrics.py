@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# cli modules are imported flat when run from cli/ and as cli.* from the repository root
+if __package__:
+    from . import tracing
+else:
+    import tracing
+
+THROUGHPUT_WINDOW = 60.0
+
+METRICS = {
+    "scale_uptime_seconds": ("gauge", "Seconds since the metrics registry was created."),
+    "scale_requests_total": ("counter", "Input requests by outcome (completed, failed)."),
+    "scale_queue_depth": ("gauge", "Work waiting to start, by queue."),
+    "scale_llm_cost_total": ("counter", "LLM cost reported through researcher.add_costs."),
+    "scale_stage_calls_total": ("counter", "Finished stage calls (research, write_report, generate, evaluation, ...) by outcome."),
+    "scale_stage_in_flight": ("gauge", "Stage calls currently running."),
+    "scale_stage_seconds_total": ("counter", "Time spent in finished stage calls."),
+    "scale_stage_throughput_per_minute": ("gauge", f"Stage calls finished per minute over the last {THROUGHPUT_WINDOW:.0f} seconds."),
+    "scale_stage_cache_lookups_total": ("counter", "Stage calls that looked in a cache."),
+    "scale_stage_cache_hits_total": ("counter", "Stage calls served from a cache."),
+    "scale_stage_cache_hit_ratio": ("gauge", "Cache hits over cache lookups."),
+}
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+class Metrics:
+    """
+    Counters and gauges for one process, rendered in the Prometheus text
+    format. Stage metrics (calls, in-flight, latency, cache hits, rolling
+    throughput) are fed by tracing spans once the registry is added as a
+    tracing listener; the scripts report requests, queue depth and cost.
+    """
+    def __init__(self, window=THROUGHPUT_WINDOW):
+        self.window = window
+        self.created = time.time()
+        self.lock = threading.Lock()
+        self.values = defaultdict(float)
+        self.finished = defaultdict(deque)
+
+    def inc(self, name, value=1.0, **labels):
+        with self.lock:
+            self.values[name, tuple(sorted(labels.items()))] += value
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.values[name, tuple(sorted(labels.items()))] = value
+
+    def span_started(self, stage):
+        self.inc("scale_stage_in_flight", stage=stage)
+
+    def span_finished(self, record):
+        stage = record["stage"]
+        with self.lock:
+            self.values["scale_stage_in_flight", (("stage", stage),)] -= 1
+            status = "failed" if record["error"] else "completed"
+            self.values["scale_stage_calls_total", (("stage", stage), ("status", status))] += 1
+            self.values["scale_stage_seconds_total", (("stage", stage),)] += record["duration"]
+            if record["cache_hit"] is not None:
+                self.values["scale_stage_cache_lookups_total", (("stage", stage),)] += 1
+                self.values["scale_stage_cache_hits_total", (("stage", stage),)] += bool(record["cache_hit"])
+            ends = self.finished[stage]
+            ends.append(record["end"])
+            while ends[0] < record["end"] - self.window:
+                ends.popleft()
+
+    def track_costs(self, researcher):
+        """
+        Wrap researcher.add_costs so every cost it records is also counted here.
+        """
+        add_costs = researcher.add_costs
+
+        def counted_add_costs(cost):
+            self.inc("scale_llm_cost_total", cost)
+            return add_costs(cost)
+
+        researcher.add_costs = counted_add_costs
+        return researcher
+
+    def render(self):
+        now = time.time()
+        # Until a full window has passed, rates are over the time since start.
+        window = max(1e-9, min(self.window, now - self.created))
+        with self.lock:
+            values = dict(self.values)
+            for stage, ends in self.finished.items():
+                while ends and ends[0] < now - self.window:
+                    ends.popleft()
+                values["scale_stage_throughput_per_minute", (("stage", stage),)] = len(ends) * 60.0 / window
+        values["scale_uptime_seconds", ()] = now - self.created
+        for (name, labels), lookups in list(values.items()):
+            if name == "scale_stage_cache_lookups_total" and lookups:
+                values["scale_stage_cache_hit_ratio", labels] = values.get(("scale_stage_cache_hits_total", labels), 0.0) / lookups
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            samples = sorted((labels, value) for (sample_name, labels), value in values.items() if sample_name == name)
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+registry = Metrics()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(port, host="127.0.0.1"):
+    """
+    Expose the registry at http://host:port/metrics from a daemon thread and
+    start feeding it from tracing spans. Returns the server (call shutdown()
+    to stop it).
+    """
+    tracing.add_listener(registry)
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving metrics at http://{host}:{server.server_port}/metrics")
+    return server
+
+def inc(name, value=1.0, **labels):
+    registry.inc(name, value, **labels)
+
+def set_gauge(name, value, **labels):
+    registry.set_gauge(name, value, **labels)
+
+def track_costs(researcher):
+    return registry.track_costs(researcher)
@@ -0,0 +1,9 @@
+"""
+Offline stand-ins for GPTResearcher, generic_prompt_call and the Argue-Eval
+judge, for load-testing the orchestration without any model behind it.
+
+Select them with "backend": "mock" in the config file; the optional "mock"
+section of the config is described in MockBackend.
+"""
+from .backend import MockBackend, DEFAULT_SETTINGS
+from .latency import Latency
@@ -0,0 +1,78 @@
+import asyncio
+import functools
+import random
+import time
+
+from .latency import Latency
+from .researcher import MockResearcher
+from .text import get_trec_format, synthetic_report
+
+DEFAULT_SETTINGS = {
+    "seed": 0,
+    "research_latency": {"distribution": "lognormal", "median": 2.0, "sigma": 0.5},
+    "write_latency": {"distribution": "lognormal", "median": 1.0, "sigma": 0.5},
+    "llm_latency": {"distribution": "lognormal", "median": 1.0, "sigma": 0.5},
+    "judge_latency": {"distribution": "lognormal", "median": 0.5, "sigma": 0.5},
+    "failure_rate": 0.0,
+    "sources": 20,
+    "report_sentences": 12,
+    "research_cost": 0.01,
+    "write_cost": 0.002,
+    "llm_cost": 0.002,
+}
+STAGES = ["research", "write", "llm", "judge"]
+
+class MockBackend:
+    """
+    Offline researcher, LLM call and judge with configurable latencies.
+
+    settings override DEFAULT_SETTINGS: a latency spec per stage (see
+    Latency), the fraction of calls that raise RuntimeError (failure_rate),
+    the shape of the synthetic output, and the seed. Every call is recorded in
+    spans as {"stage", "key", "start", "end", "ok"} (time.perf_counter), which
+    is what the load test reads.
+    """
+    name = "mock"
+
+    def __init__(self, settings=None):
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self.latencies = {stage: Latency(self.settings[f"{stage}_latency"]) for stage in STAGES}
+        self.rng = random.Random(self.settings["seed"])
+        self.spans = []
+        self.GPTResearcher = functools.partial(MockResearcher, backend=self)
+        self.get_trec_format = get_trec_format
+
+    async def wait(self, stage, key):
+        """
+        Sleep for a sampled stage latency, record the span and maybe fail.
+        """
+        start = time.perf_counter()
+        await asyncio.sleep(self.latencies[stage].sample(self.rng))
+        ok = self.rng.random() >= self.settings["failure_rate"]
+        self.spans.append({"stage": stage, "key": key, "start": start, "end": time.perf_counter(), "ok": ok})
+        if not ok:
+            raise RuntimeError(f"mock {stage} failure")
+
+    async def generic_prompt_call(self, agent_role_prompt=None, user_prompt=None, cfg=None, websocket=None, cost_callback=None, step=None, **kwargs):
+        await self.wait("llm", step)
+        if cost_callback is not None:
+            cost_callback(self.settings["llm_cost"])
+        return synthetic_report(self.rng, self.settings["report_sentences"], self.settings["sources"])
+
+    async def evaluate_report(self, report, nuggets, provider=None):
+        await self.wait("judge", report["metadata"]["topic_id"])
+        return {
+            "segments": [
+                {
+                    "text": response["text"],
+                    "judgments": [
+                        {
+                            "judgment_type_id": "mock_support",
+                            "response": self.rng.choice(["YES", "NO"]),
+                            "evaluator": "mock"
+                        }
+                    ]
+                }
+                for response in report["responses"]
+            ]
+        }
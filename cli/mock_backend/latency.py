@@ -0,0 +1,27 @@
+import math
+
+class Latency:
+    """
+    A latency distribution read from the config.
+
+    The spec is either a number of seconds or a dict with a "distribution"
+    key: "fixed" (seconds), "uniform" (low, high), "exponential" (mean) or
+    "lognormal" (median, sigma). Samples come from the backend's seeded rng.
+    """
+    def __init__(self, spec):
+        if isinstance(spec, (int, float)):
+            spec = {"distribution": "fixed", "seconds": spec}
+        self.spec = dict(spec)
+        self.distribution = self.spec.get("distribution", "fixed")
+        if self.distribution not in ("fixed", "uniform", "exponential", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+
+    def sample(self, rng):
+        spec = self.spec
+        if self.distribution == "fixed":
+            return spec.get("seconds", 0.0)
+        if self.distribution == "uniform":
+            return rng.uniform(spec["low"], spec["high"])
+        if self.distribution == "exponential":
+            return rng.expovariate(1.0 / spec["mean"])
+        return rng.lognormvariate(math.log(spec["median"]), spec["sigma"])
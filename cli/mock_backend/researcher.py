@@ -0,0 +1,33 @@
+from .text import synthetic_context, synthetic_report
+
+class MockResearcher:
+    """
+    Stands in for GPTResearcher: same constructor and the attributes the
+    pipeline uses (cfg, websocket, add_costs, context), with conduct_research
+    and write_report that wait for a sampled latency and return synthetic
+    text in the real formats.
+    """
+    def __init__(self, query, background, report_type, websocket=None, config_path=None, backend=None):
+        self.query = query
+        self.background = background
+        self.report_type = report_type
+        self.websocket = websocket
+        self.cfg = backend.settings
+        self.backend = backend
+        self.context = None
+        self.costs = 0.0
+
+    def add_costs(self, cost):
+        self.costs += cost
+
+    async def conduct_research(self):
+        await self.backend.wait("research", self.query)
+        self.context, doc_dict = synthetic_context(self.backend.rng, self.backend.settings["sources"])
+        self.add_costs(self.backend.settings["research_cost"])
+        return self.context, doc_dict
+
+    async def write_report(self, custom_prompt=None):
+        await self.backend.wait("write", self.query)
+        self.add_costs(self.backend.settings["write_cost"])
+        settings = self.backend.settings
+        return synthetic_report(self.backend.rng, settings["report_sentences"], settings["sources"])
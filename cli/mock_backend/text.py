@@ -0,0 +1,53 @@
+import re
+
+WORDS = [
+    "Rice", "democracy", "policy", "the", "Secretary", "of", "State", "reform", "summit",
+    "administration", "alliance", "election", "statement", "visit", "agreement", "2005",
+]
+
+def _sentence(rng, words=(8, 24)):
+    return " ".join(rng.choices(WORDS, k=rng.randint(*words)))
+
+def synthetic_context(rng, sources):
+    """
+    A research context in the Source/Title/Content layout and its doc_dict.
+    """
+    records = []
+    doc_dict = {}
+    for i in range(sources):
+        url = f"https://example.org/mock/{i}"
+        doc_dict[url] = f"mock_doc_{i}"
+        passage = " ".join(_sentence(rng) + "." for _ in range(rng.randint(2, 6)))
+        records.append(f"Source: {url}\nTitle: {_sentence(rng, (3, 8))}\nContent: {passage}\n")
+    return "\n".join(records), doc_dict
+
+def synthetic_report(rng, sentences, sources):
+    """
+    Report text with [Source: N] citations, like a written report.
+    """
+    parts = []
+    for _ in range(sentences):
+        citations = "".join(f" [Source: {rng.randint(1, sources)}]" for _ in range(rng.randint(0, 2)))
+        parts.append(_sentence(rng) + citations + ".")
+    return " ".join(parts)
+
+def get_trec_format(metadata, report, passages):
+    """
+    Stands in for gpt_researcher.utils.output.get_trec_format: one response
+    per sentence, citing the docids of the passages its [Source: N] refer to.
+    """
+    responses = []
+    references = []
+    for sentence in re.split(r"(?<=\.)\s+", report.strip()):
+        citations = {}
+        for number in re.findall(r"\[Source: (\d+)\]", sentence):
+            index = int(number) - 1
+            if 0 <= index < len(passages):
+                docid = passages[index]["docid"]
+                citations[docid] = 1.0
+                if docid not in references:
+                    references.append(docid)
+        text = re.sub(r"\s*\[Source: \d+\]", "", sentence).strip()
+        if text:
+            responses.append({"text": text, "citations": citations})
+    return {"metadata": dict(metadata), "responses": responses, "references": references}
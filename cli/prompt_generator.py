@@ -1,5 +1,7 @@
 import pandas as pd
+import numpy as np
 import itertools
+import random
 
 def build_prompt(combo, query, background):
     (
@@ -75,4 +77,199 @@ def generate_prompt_df(query, background, instructions):
             "extra_instruction": combo[11],
             "prompt_text": prompt_text
         })
-    return pd.DataFrame(prompt_variants)
\ No newline at end of file
+    return pd.DataFrame(prompt_variants)
+
+# Column name and instruction-set key for each dimension, in the order used by
+# build_prompt and itertools.product (the last dimension varies fastest).
+DIMENSIONS = [
+    ("total_words", "total_words_options"),
+    ("focus_instruction", "focus_instructions"),
+    ("structure_instruction", "structure_instructions"),
+    ("fact_instruction", "fact_instructions"),
+    ("length_instruction", "length_instructions"),
+    ("depth_instruction", "depth_instructions"),
+    ("opinion_instruction", "opinion_instructions"),
+    ("bias_instruction", "bias_instructions"),
+    ("citation_instruction", "citation_instructions"),
+    ("tone_instruction", "tone_instructions"),
+    ("formatting_instruction", "formatting_instructions"),
+    ("extra_instruction", "extra_instructions"),
+]
+TOTAL_WORDS = 0
+LENGTH = 4
+
+def build_preamble(query, background):
+    """
+    Text that build_prompt places before the report requirements.
+    """
+    return f"""Information: "{query}"
+---
+
+Using the above information, provide supporting facts for the query: "{background}"
+
+"""
+
+class PromptTemplate:
+    """
+    Report-requirements prompt compiled against an instruction set.
+
+    Every option is rendered into its "- ..." line once (the length line once
+    per total_words option), so a prompt is a single join of precomputed
+    segments selected by integer codes.
+    """
+    def __init__(self, options, preamble=""):
+        self.head = (preamble + "Report Requirements:\n").lstrip()
+        self.segments = []
+        for d, dim_options in enumerate(options):
+            if d == TOTAL_WORDS:
+                self.segments.append(None)
+            elif d == LENGTH:
+                self.segments.append([
+                    [f"- {length.replace('{total_words}', str(words))}\n" for length in dim_options]
+                    for words in options[TOTAL_WORDS]
+                ])
+            else:
+                self.segments.append([f"- {option}\n" for option in dim_options])
+        # build_prompt strips the finished prompt, which only touches the last line.
+        self.segments[-1] = [segment.rstrip() for segment in self.segments[-1]]
+
+    def render(self, codes):
+        parts = [self.head]
+        for d, segments in enumerate(self.segments):
+            if d == TOTAL_WORDS:
+                continue
+            if d == LENGTH:
+                parts.append(segments[codes[TOTAL_WORDS]][codes[LENGTH]])
+            else:
+                parts.append(segments[codes[d]])
+        return "".join(parts)
+
+    def render_batch(self, codes):
+        """
+        Render many prompts from per-dimension code columns in one pass.
+        """
+        columns = []
+        for d, segments in enumerate(self.segments):
+            if d == TOTAL_WORDS:
+                continue
+            if d == LENGTH:
+                columns.append(map(lambda w, l, table=segments: table[w][l], codes[TOTAL_WORDS], codes[LENGTH]))
+            else:
+                columns.append(map(segments.__getitem__, codes[d]))
+        return list(map(lambda *parts: "".join(parts), itertools.repeat(self.head), *columns))
+
+class PromptSpace:
+    """
+    Index-addressable view of every prompt variant.
+
+    Index i corresponds to row i of generate_prompt_df (id "prompt_{i+1}"),
+    but combinations and prompt texts are only built when they are asked for.
+    Dimensions are stored as option lists plus small-int codes per variant.
+    """
+    def __init__(self, instructions, preamble=""):
+        self.columns = [column for column, _ in DIMENSIONS]
+        self.options = [list(instructions[key]) for _, key in DIMENSIONS]
+        self.radices = [len(options) for options in self.options]
+        self.dtypes = [np.min_scalar_type(max(radix - 1, 0)) for radix in self.radices]
+        self.template = PromptTemplate(self.options, preamble)
+        self._size = 1
+        for radix in self.radices:
+            self._size *= radix
+
+    def __len__(self):
+        return self._size
+
+    def _check(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(f"prompt index {index} out of range for {self._size} variants")
+        return index
+
+    def decode(self, index):
+        """
+        Decode a mixed-radix index into one option code per dimension.
+        """
+        index = self._check(index)
+        codes = [0] * len(self.radices)
+        for d in range(len(self.radices) - 1, -1, -1):
+            index, codes[d] = divmod(index, self.radices[d])
+        return codes
+
+    def combo(self, index):
+        """
+        The option tuple build_prompt would receive for this variant.
+        """
+        return tuple(options[code] for options, code in zip(self.options, self.decode(index)))
+
+    def codes(self, indices):
+        """
+        Decode many indices at once into one small-int array per dimension.
+        """
+        rest = np.asarray(indices, dtype=np.int64)
+        if rest.size and (rest.min() < 0 or rest.max() >= self._size):
+            raise IndexError(f"prompt indices out of range for {self._size} variants")
+        codes = [None] * len(self.radices)
+        for d in range(len(self.radices) - 1, -1, -1):
+            rest, digit = np.divmod(rest, self.radices[d])
+            codes[d] = digit.astype(self.dtypes[d])
+        return codes
+
+    def row(self, index):
+        """
+        Build the generate_prompt_df row for a single variant.
+        """
+        index = self._check(index)
+        codes = self.decode(index)
+        row = {"id": f"prompt_{index+1}"}
+        row.update((column, options[code]) for column, options, code in zip(self.columns, self.options, codes))
+        row["prompt_text"] = self.template.render(codes)
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.row(i) for i in range(self._size)[key]]
+        return self.row(key)
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self.row(i)
+
+    def render_batch(self, indices):
+        return self.template.render_batch([column.tolist() for column in self.codes(indices)])
+
+    def sample_indices(self, n, random_state=None):
+        """
+        Draw n distinct variant indices without enumerating the space.
+        """
+        rng = random.Random(random_state)
+        return rng.sample(range(self._size), min(n, self._size))
+
+    def to_df(self, indices, prompt_text=True):
+        """
+        Materialize the given variants as a DataFrame indexed like generate_prompt_df.
+
+        Instruction columns are categoricals over the option lists, so each row
+        stores only its codes; prompt_text=False skips rendering the prompts.
+        """
+        indices = np.asarray(list(indices), dtype=np.int64)
+        codes = self.codes(indices)
+        df = pd.DataFrame({"id": [f"prompt_{i+1}" for i in indices.tolist()]}, index=indices)
+        for column, options, column_codes in zip(self.columns, self.options, codes):
+            # Categories must be unique, but an instruction set may repeat an option.
+            categories = list(dict.fromkeys(options))
+            if len(categories) < len(options):
+                column_codes = np.array([categories.index(option) for option in options], dtype=column_codes.dtype)[column_codes]
+            df[column] = pd.Categorical.from_codes(column_codes, categories=categories)
+        if prompt_text:
+            df["prompt_text"] = self.template.render_batch([column.tolist() for column in codes])
+        return df
+
+    def sample(self, n, random_state=None):
+        return self.to_df(self.sample_indices(n, random_state))
+
+def generate_prompt_space(query, background, instructions):
+    """
+    Lazy counterpart of generate_prompt_df.
+    """
+    return PromptSpace(instructions, build_preamble(query, background))
@@ -0,0 +1,262 @@
+# to run (from cli/)
+# python prompt_search.py ../example-request-3.jsonl --pool 32 --eta 2 --output search.json
+# (with --config mock_config.json and --instructions/--nuggets pointing at local
+# files the search runs offline against the mock backend)
+#
+# Successive halving over prompt variants: every variant in a sampled pool is
+# scored on a few topics, the best 1/eta are kept, and only the survivors are
+# scored on eta times as many topics, until one variant is left or the topics
+# run out. Scores are Argue-Eval judgments, so a near-best prompt is found with
+# a fraction of the generation and judge calls of a full sweep.
+
+import argparse
+import asyncio
+import json
+import math
+import random
+
+import tracing
+from backend import load_backend
+from checkpoint import iter_requests
+from concurrency import run_pipeline
+from config_loader import load_instructions
+from evaluator import EvaluatorSession
+from llm_cache import LLMCache
+from main import CONFIG_PATH, INSTRUCTION_JSON, MAX_IN_FLIGHT, MAX_JUDGES_IN_FLIGHT, NUGGETS_PATH, generate_report
+from prompt_generator import generate_prompt_space
+from report_generator import CustomLogsHandler
+
+POSITIVE_RESPONSES = ("yes", "true", "support")
+MIN_COVERAGE = 0.75  # Fraction of a rung's topics a variant must be scored on to survive
+
+def judgment_score(result):
+    """
+    Fraction of an Argue-Eval result's judgments that answered positively
+    (YES/true/supported, True, or a number > 0); None if there were none.
+    """
+    positive = total = 0
+    for segment in result.get("segments", []):
+        for judgment in segment.get("judgments", []):
+            response = judgment.get("response")
+            if isinstance(response, str):
+                positive += response.strip().lower().startswith(POSITIVE_RESPONSES)
+            elif isinstance(response, (bool, int, float)):
+                positive += response > 0
+            else:
+                continue
+            total += 1
+    return positive / total if total else None
+
+def mean_score(scores):
+    scores = [score for score in scores if score is not None]
+    return sum(scores) / len(scores) if scores else None
+
+async def successive_halving(candidates, topics, evaluate_batch, eta=2, min_topics=1, min_coverage=MIN_COVERAGE):
+    """
+    Find the best candidate by successive halving.
+
+    Rung r scores the surviving candidates on the first min_topics * eta**r
+    topics (at most all of them) and keeps the best ceil(n / eta). Scores are
+    kept across rungs, so a survivor is only evaluated on topics it has not
+    seen. evaluate_batch(pairs) scores a list of (candidate, topic) pairs and
+    returns one score (higher is better, None for failed) per pair.
+    A candidate is ranked by its mean over the topics it was scored on, but
+    only one scored on at least min_coverage of the rung's topics can
+    survive; the others rank last. Candidates with equal means keep their
+    original order.
+
+    Returns {"best", "best_score", "best_scored_topics", "rungs", "scores"}:
+    each rung records how many topics it used, how many evaluations it ran
+    and its ranking as (candidate, mean, topics scored); scores maps
+    (candidate, topic) to its score. Raises RuntimeError if no candidate in a
+    rung has enough scored topics.
+    """
+    survivors = list(candidates)
+    scores = {}
+    rungs = []
+    r = 0
+    while True:
+        rung_topics = topics[:min(len(topics), min_topics * eta ** r)]
+        pairs = [(candidate, topic) for candidate in survivors for topic in rung_topics if (candidate, topic) not in scores]
+        scores.update(zip(pairs, await evaluate_batch(pairs)))
+        means = {candidate: mean_score(scores[candidate, topic] for topic in rung_topics) for candidate in survivors}
+        scored = {candidate: sum(scores[candidate, topic] is not None for topic in rung_topics) for candidate in survivors}
+        covered = {candidate: scored[candidate] > 0 and scored[candidate] >= min_coverage * len(rung_topics) for candidate in survivors}
+        ranked = sorted(survivors, key=lambda candidate: (not covered[candidate], -(means[candidate] or 0.0)))
+        rungs.append({
+            "topics": len(rung_topics),
+            "evaluations": len(pairs),
+            "ranking": [(candidate, means[candidate], scored[candidate]) for candidate in ranked]
+        })
+        survivors = [candidate for candidate in ranked[:max(1, math.ceil(len(ranked) / eta))] if covered[candidate]]
+        if not survivors:
+            raise RuntimeError(f"no variant was scored on at least {min_coverage:.0%} of {len(rung_topics)} topics")
+        if len(survivors) == 1 or len(rung_topics) == len(topics):
+            break
+        r += 1
+    best = ranked[0]
+    return {"best": best, "best_score": means[best], "best_scored_topics": scored[best], "rungs": rungs, "scores": scores}
+
+async def search_prompts(
+    requests,
+    pool_size: int = 32,
+    eta: int = 2,
+    min_topics: int = 1,
+    max_in_flight: int = MAX_IN_FLIGHT,
+    max_judges_in_flight: int = MAX_JUDGES_IN_FLIGHT,
+    llm_cache: LLMCache = None,
+    config_path: str = CONFIG_PATH,
+    instruction_json: str = INSTRUCTION_JSON,
+    nuggets_path: str = NUGGETS_PATH,
+    random_state: int = 42,
+    min_coverage: float = MIN_COVERAGE
+):
+    """
+    Successive-halving search over a pool of sampled prompt variants.
+
+    Each request in requests is a topic: a variant is scored on a topic by
+    generating a report from its prompt (with that topic's query and
+    background, as main.research_prompt_report_eval does) and judging it
+    against the topic's nuggets ("nuggets_path" in the request, else
+    nuggets_path). Each rung runs through the same generation/judge pipeline
+    with its own concurrency limits; failed calls leave a topic unscored
+    (see min_coverage in successive_halving). Returns the successive_halving result
+    plus the variant rows and the number of evaluations a full sweep would
+    have needed.
+    """
+    backend = load_backend(config_path)
+    instructions = load_instructions(instruction_json)
+    requests = {d["request_id"]: d for d in requests}
+    topics = list(requests)
+    random.Random(random_state).shuffle(topics)
+
+    prompt_spaces = {}
+    researchers = {}
+    for topic_id, d in requests.items():
+        prompt_spaces[topic_id] = generate_prompt_space(d["problem_statement"], d["background"], instructions)
+        researchers[topic_id] = backend.GPTResearcher(d["problem_statement"], d["background"], "SCALE25_report",
+                                                      websocket=CustomLogsHandler(), config_path=config_path)
+    # Variant i has the same instruction combination on every topic; only the preamble differs.
+    candidates = prompt_spaces[topics[0]].sample_indices(pool_size, random_state=random_state)
+    print(f"Searching {len(candidates)} of {len(prompt_spaces[topics[0]])} prompt variants over {len(topics)} topics")
+
+    evaluator = EvaluatorSession(
+        {topic_id: d.get("nuggets_path", nuggets_path) for topic_id, d in requests.items()},
+        provider="hltcoe_local",
+        backend=backend
+    )
+
+    async def generate(pair):
+        index, topic_id = pair
+        row = prompt_spaces[topic_id].row(index)
+        try:
+            report = await generate_report(row, researchers[topic_id], llm_cache, backend.generic_prompt_call)
+        except Exception as e:
+            print(f"Generation failed for {row['id']} on topic {topic_id}: {e}")
+            return None
+        report["metadata"]["topic_id"] = topic_id
+        return report
+
+    async def judge(pair, report):
+        if report is None:
+            return None
+        try:
+            result = await evaluator.evaluate(report, pair[1])
+        except Exception as e:
+            print(f"Evaluation failed for prompt_{pair[0]+1} on topic {pair[1]}: {e}")
+            return None
+        return judgment_score(result)
+
+    async def evaluate_batch(pairs):
+        _, scores = await run_pipeline(pairs, generate, judge, max_in_flight, max_judges_in_flight)
+        return scores
+
+    result = await successive_halving(candidates, topics, evaluate_batch, eta, min_topics, min_coverage)
+    for rung in result["rungs"]:
+        print(f"rung: {len(rung['ranking'])} variants on {rung['topics']} topics ({rung['evaluations']} evaluations)")
+    prompt_space = prompt_spaces[topics[0]]
+    result["variants"] = {index: dict(zip(prompt_space.columns, prompt_space.combo(index))) for index in candidates}
+    result["full_sweep_evaluations"] = len(candidates) * len(topics)
+    return result
+
+def to_json(result):
+    """
+    JSON-friendly summary of a search_prompts result.
+    """
+    def variant(index, score, scored_topics, topics):
+        row = {"id": f"prompt_{index+1}", "score": score, "scored_topics": scored_topics, "topics": topics}
+        row.update(result["variants"][index])
+        return row
+
+    evaluations = len(result["scores"])
+    return {
+        "best": variant(result["best"], result["best_score"], result["best_scored_topics"], result["rungs"][-1]["topics"]),
+        "evaluations": evaluations,
+        "full_sweep_evaluations": result["full_sweep_evaluations"],
+        "rungs": [
+            {
+                "topics": rung["topics"],
+                "evaluations": rung["evaluations"],
+                "ranking": [variant(index, score, scored, rung["topics"]) for index, score, scored in rung["ranking"]]
+            }
+            for rung in result["rungs"]
+        ],
+        "scores": [
+            {"id": f"prompt_{index+1}", "topic_id": topic_id, "score": score}
+            for (index, topic_id), score in result["scores"].items()
+        ]
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("requests", help="JSONL requests; each one is a topic to score variants on")
+    parser.add_argument("--config", default=CONFIG_PATH)
+    parser.add_argument("--instructions", default=INSTRUCTION_JSON)
+    parser.add_argument("--nuggets", default=NUGGETS_PATH, help='nuggets file for requests without "nuggets_path"')
+    parser.add_argument("--pool", type=int, default=32, help="prompt variants sampled into the first rung")
+    parser.add_argument("--eta", type=int, default=2, help="keep the best 1/eta of the variants after each rung")
+    parser.add_argument("--min-topics", type=int, default=1, help="topics per variant in the first rung")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT, help="generation calls at once")
+    parser.add_argument("--judges", type=int, default=MAX_JUDGES_IN_FLIGHT, help="evaluations at once")
+    parser.add_argument("--seed", type=int, default=42, help="seed for the variant pool and topic order")
+    parser.add_argument("--min-coverage", type=float, default=MIN_COVERAGE,
+                        help="fraction of a rung's topics a variant must be scored on to survive it")
+    parser.add_argument("--llm-cache", default=None, help="SQLite file for cached generations")
+    parser.add_argument("--trace", default=None, help="append per-stage timing spans to this JSONL file")
+    parser.add_argument("--output", default="prompt_search.json")
+    args = parser.parse_args()
+    if args.eta < 2:
+        parser.error("--eta must be at least 2")
+
+    llm_cache = LLMCache(args.llm_cache, args.config) if args.llm_cache else None
+    tracer = tracing.configure(args.trace, run_id="prompt-search")
+    requests = list(iter_requests(args.requests))
+    result = asyncio.run(search_prompts(
+        requests,
+        pool_size=args.pool,
+        eta=args.eta,
+        min_topics=args.min_topics,
+        max_in_flight=args.max_in_flight,
+        max_judges_in_flight=args.judges,
+        llm_cache=llm_cache,
+        config_path=args.config,
+        instruction_json=args.instructions,
+        nuggets_path=args.nuggets,
+        random_state=args.seed,
+        min_coverage=args.min_coverage
+    ))
+    tracer.close()
+    if llm_cache is not None:
+        print(f"LLM cache: {llm_cache.stats()}")
+        llm_cache.close()
+
+    summary = to_json(result)
+    with open(args.output, "w") as f:
+        json.dump(summary, f, indent=2)
+    best = summary["best"]
+    print(f"Best variant {best['id']} (score {best['score']} on {best['scored_topics']}/{best['topics']} topics) after {summary['evaluations']} evaluations; "
+          f"a full sweep of the pool would take {summary['full_sweep_evaluations']}")
+    print(f"Saved search results to {args.output}")
+
+if __name__ == "__main__":
+    main()
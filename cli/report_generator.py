@@ -5,8 +5,17 @@ from datetime import datetime
 import json
 import re
 
-from gpt_researcher import GPTResearcher
-from gpt_researcher.utils.llm import generic_prompt_call
+# cli modules are imported flat when run from cli/ and as cli.* from the repository root
+if __package__:
+    from . import tracing
+    from . import metrics
+    from .backend import load_backend
+    from .context_parser import extract_titles_passages
+else:
+    import tracing
+    import metrics
+    from backend import load_backend
+    from context_parser import extract_titles_passages
 
 class CustomLogsHandler:
     """
@@ -18,15 +27,35 @@ class CustomLogsHandler:
         if data.get('type') == 'logs':
             self.logs.append(data)
 
-async def get_report(query, background, report_type, config_file):
-    semaphore = asyncio.Semaphore(1)
+async def conduct_research(researcher, query, background, report_type, config_file, cache=None, request_id=None):
+    """
+    Run researcher.conduct_research(), reusing a cached result when available.
+    """
+    with tracing.span("research", request_id, bytes_in=tracing.num_bytes(query + background)) as span:
+        cached = None
+        if cache is not None:
+            key = cache.key(query, background, report_type, config_file)
+            cached = cache.get(key)
+        if cached is not None:
+            print("Using cached research context")
+            context, doc_dict, passages = cached
+            researcher.context = context
+        else:
+            context, doc_dict = await researcher.conduct_research()
+            passages = extract_titles_passages(context, doc_dict)
+            if cache is not None:
+                cache.put(key, context, doc_dict, passages)
+        span.set(bytes_out=tracing.num_bytes(context), cache_hit=None if cache is None else cached is not None)
+    return context, doc_dict, passages
+
+async def get_report(query, background, report_type, config_file, cache=None, request_id=None):
     custom_logs_handler = CustomLogsHandler()
-    researcher = GPTResearcher(query, background, report_type, websocket=custom_logs_handler, config_path=config_file)
+    researcher = metrics.track_costs(load_backend(config_file).GPTResearcher(query, background, report_type, websocket=custom_logs_handler, config_path=config_file))
 
-    async with semaphore:
-        context, doc_dict = await researcher.conduct_research()
-        passages = extract_titles_passages(context, doc_dict)
+    context, doc_dict, passages = await conduct_research(researcher, query, background, report_type, config_file, cache, request_id)
+    with tracing.span("write_report", request_id, bytes_in=tracing.num_bytes(context)) as span:
         raw_report = await researcher.write_report()
+        span.set(bytes_out=tracing.num_bytes(raw_report))
 
     # Construct the report in the desired format
     report = {
@@ -47,19 +76,80 @@ async def get_report(query, background, report_type, config_file):
 
     return report, custom_logs_handler.logs, passages, context, doc_dict
 
-async def write_reports(output_file, data, config_file, report_type):
-    with open(output_file + '.log', 'w') as LOG, open(output_file, 'w') as OUT:
-        for i, d in enumerate(data):
-            print(f"\n============ request {i} request_id:{d['request_id']} ==============")
-            query = d["problem_statement"]
-            background = d["background"]
-            start_time = time.time()
+async def write_reports(output_file, data, config_file, report_type, cache=None, concurrency=1, timeout=None, ordered=True, checkpoint=None):
+    """
+    Generate a report for every request in data and write them to output_file.
 
-            report, logs, passages, context, doc_dict = await get_report(query, background, report_type, config_file)
+    data may be any iterable (e.g. checkpoint.iter_requests), and only a small
+    window of requests is read ahead of the ones running. Up to `concurrency`
+    requests are researched at once through one shared semaphore. A request
+    that raises, or takes longer than `timeout` seconds, is logged with its
+    error and skipped; it is not marked in the checkpoint, so a resumed run
+    retries it.
+    With ordered=True outputs are written in input order, otherwise each one
+    is written as soon as it finishes. With a checkpoint, requests already
+    completed are skipped and outputs are appended to the existing files.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    window = 2 * concurrency
 
+    async def run_request(i, d):
+        async with semaphore:
+            print(f"\n============ request {i} request_id:{d['request_id']} ==============")
+            start_time = time.time()
+            error = None
+            try:
+                result = await asyncio.wait_for(
+                    get_report(d["problem_statement"], d["background"], report_type, config_file, cache, d["request_id"]),
+                    timeout
+                )
+            except asyncio.TimeoutError:
+                error = f"timed out after {timeout} seconds"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            if error is not None:
+                print(f"========== request {i} failed: {error} =========\n")
+                d['error'] = error
+                metrics.inc("scale_requests_total", status="failed")
+                return d, None
             elapsed_time = time.time() - start_time
             print(f"========== request {i} finished in {elapsed_time:.0f} seconds =========\n")
+            metrics.inc("scale_requests_total", status="completed")
+            return d, result
+
+    async def completed_requests():
+        requests = (
+            (i, d) for i, d in enumerate(data)
+            if checkpoint is None or not checkpoint.is_done(d['request_id'])
+        )
+        pending = []
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < window:
+                request = next(requests, None)
+                if request is None:
+                    exhausted = True
+                else:
+                    pending.append(asyncio.create_task(run_request(*request)))
+            if not pending:
+                return
+            if ordered:
+                yield await pending.pop(0)
+            else:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.remove(task)
+                    yield task.result()
+
+    mode = 'a' if checkpoint is not None and checkpoint.done else 'w'
+    with open(output_file + '.log', mode) as LOG, open(output_file, mode) as OUT:
+        async for d, result in completed_requests():
+            if result is None:
+                LOG.write(json.dumps(d) + '\n')
+                LOG.flush()
+                continue
 
+            report, logs, passages, context, doc_dict = result
             d['passages'] = passages
             d['logs'] = logs
             d['report'] = report
@@ -69,11 +159,5 @@ async def write_reports(output_file, data, config_file, report_type):
             LOG.flush()
             OUT.flush()
             sys.stdout.flush()
-
-def extract_titles_passages(context, doc_dict):
-    """
-    Placeholder for passage extraction logic.
-    """
-    # You will need to implement the actual logic as in your original script.
-    # For now, return an empty list.
-    return []
\ No newline at end of file
+            if checkpoint is not None:
+                checkpoint.mark_done(d['request_id'])
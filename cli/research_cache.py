@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import tempfile
+
+DEFAULT_MAX_BYTES = 1024 * 2**20
+
+class ResearchCache:
+    """
+    On-disk cache of conduct_research() results.
+
+    Entries hold (context, doc_dict, passages) and are keyed by a hash of the
+    query, background, report type and the contents of the config file. When
+    the cache grows past max_bytes the least recently used entries are removed.
+    With refresh=True lookups always miss, so research is redone and the
+    entries are rewritten.
+    """
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, refresh=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, query, background, report_type, config_file):
+        digest = hashlib.sha256()
+        for part in (query, background, report_type):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        with open(config_file, "rb") as f:
+            digest.update(f.read())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """
+        Return (context, doc_dict, passages) for key, or None on a miss.
+        """
+        if self.refresh:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        os.utime(path)
+        return entry["context"], entry["doc_dict"], entry["passages"]
+
+    def put(self, key, context, doc_dict, passages):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"context": context, "doc_dict": doc_dict, "passages": passages}, f)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
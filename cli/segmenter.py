@@ -0,0 +1,59 @@
+import re
+
+# One pattern for both token kinds, so a report is tokenized in a single
+# finditer pass. The boundary alternative is the sentence splitter previously
+# used in cli/main.py: a whitespace character after "." or "?", unless it
+# follows an abbreviation like "e.g." or "Mr.". It matches the punctuation
+# too (so every token starts with one of "[.?" and the regex engine can skip
+# ahead to candidates); the split point is the whitespace at match.end() - 1.
+TOKEN_PATTERN = re.compile(
+    r"\[Source: (?P<source>\d+)\]"
+    r"|[.?](?<!\w\.\w[.?])(?<![A-Z][a-z]\.)\s"
+)
+
+def _sentence(text, start, end, citations):
+    stripped = text[start:end]
+    left = len(stripped) - len(stripped.lstrip())
+    stripped = stripped.strip()
+    if not stripped:
+        return None
+    return {
+        "text": stripped,
+        "start": start + left,
+        "end": start + left + len(stripped),
+        "citations": list(dict.fromkeys(citations))
+    }
+
+def segment_report(text):
+    """
+    Split a generated report into cited sentences in one linear pass.
+
+    Returns (sentences, references). Each sentence is a dict with its stripped
+    text, start/end character offsets into `text` and the source ids cited in
+    it; references holds every cited source id once, in first-seen order.
+    """
+    sentences = []
+    references = {}
+    citations = []
+    start = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        source = match.group("source")
+        if source is not None:
+            citations.append(source)
+            references[source] = None
+            continue
+        sentence = _sentence(text, start, match.end() - 1, citations)
+        if sentence is not None:
+            sentences.append(sentence)
+        citations = []
+        start = match.end()
+    sentence = _sentence(text, start, len(text), citations)
+    if sentence is not None:
+        sentences.append(sentence)
+    return sentences, list(references)
+
+def segment_reports(texts):
+    """
+    Segment a batch of reports; returns one (sentences, references) pair per report.
+    """
+    return [segment_report(text) for text in texts]
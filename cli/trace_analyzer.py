@@ -0,0 +1,127 @@
+# to run
+# python cli/trace_analyzer.py trace.jsonl [more traces ...] [--json summary.json]
+#
+# Summarizes the spans written by tracing.py (prompt_final.py --trace,
+# trans.py --trace, ...): per-stage latency percentiles, cache hits and bytes,
+# and the critical path of each run.
+
+import argparse
+import bisect
+import json
+import math
+from collections import defaultdict
+
+def load_spans(paths):
+    spans = []
+    for path in paths:
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    spans.append(json.loads(line))
+    return spans
+
+def percentile(values, q):
+    """
+    Nearest-rank percentile of values (q in 0-100); None for no values.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+def stage_summary(spans):
+    """
+    Latency percentiles, error and cache-hit counts and bytes per stage.
+    """
+    by_stage = defaultdict(list)
+    for span in spans:
+        by_stage[span["stage"]].append(span)
+    summary = {}
+    for stage, stage_spans in sorted(by_stage.items()):
+        durations = [span["duration"] for span in stage_spans]
+        summary[stage] = {
+            "count": len(stage_spans),
+            "errors": sum(1 for span in stage_spans if span.get("error")),
+            "cache_hits": sum(1 for span in stage_spans if span.get("cache_hit")),
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "p99": percentile(durations, 99),
+            "max": max(durations),
+            "total": sum(durations),
+            "bytes_in": sum(span.get("bytes_in") or 0 for span in stage_spans),
+            "bytes_out": sum(span.get("bytes_out") or 0 for span in stage_spans),
+        }
+    return summary
+
+def critical_path(spans):
+    """
+    Walk back from the span that ends last, each time to the span that ended
+    most recently before the current one started; time between them is
+    "wait". Returns (seconds per stage along the path, the path's spans).
+    """
+    spans = sorted(spans, key=lambda span: span["end"])
+    ends = [span["end"] for span in spans]
+    run_start = min(span["start"] for span in spans)
+    breakdown = defaultdict(float)
+    path = []
+    i = len(spans) - 1
+    while i >= 0:
+        span = spans[i]
+        path.append(span)
+        breakdown[span["stage"]] += span["end"] - span["start"]
+        i = min(i - 1, bisect.bisect_right(ends, span["start"]) - 1)
+        previous_end = spans[i]["end"] if i >= 0 else run_start
+        breakdown["wait"] += max(0.0, span["start"] - previous_end)
+    path.reverse()
+    return dict(breakdown), path
+
+def summarize(spans):
+    """
+    Per-run summary: wall time, stage table and critical-path breakdown.
+    """
+    runs = defaultdict(list)
+    for span in spans:
+        runs[span.get("run_id")].append(span)
+    summary = {}
+    for run_id, run_spans in runs.items():
+        breakdown, path = critical_path(run_spans)
+        summary[run_id] = {
+            "spans": len(run_spans),
+            "wall": max(span["end"] for span in run_spans) - min(span["start"] for span in run_spans),
+            "stages": stage_summary(run_spans),
+            "critical_path": breakdown,
+            "critical_path_spans": len(path),
+        }
+    return summary
+
+def print_summary(summary):
+    def fmt(value):
+        return "-" if value is None else f"{value:.3f}"
+
+    for run_id, run in summary.items():
+        print(f"run {run_id}: {run['spans']} spans over {run['wall']:.1f} s")
+        print(f"  {'stage':<14} {'count':>6} {'errors':>6} {'hits':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'MB in':>8} {'MB out':>8}")
+        for stage, s in run["stages"].items():
+            print(f"  {stage:<14} {s['count']:>6} {s['errors']:>6} {s['cache_hits']:>6} {fmt(s['p50']):>8} {fmt(s['p95']):>8} "
+                  f"{fmt(s['p99']):>8} {fmt(s['max']):>8} {s['bytes_in'] / 2**20:>8.2f} {s['bytes_out'] / 2**20:>8.2f}")
+        print(f"  critical path ({run['critical_path_spans']} spans):")
+        for stage, seconds in sorted(run["critical_path"].items(), key=lambda item: -item[1]):
+            print(f"    {stage:<14} {seconds:>9.3f} s {seconds / max(run['wall'], 1e-9):>6.0%}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("traces", nargs="+", help="JSONL trace files")
+    parser.add_argument("--json", help="also write the summary to this JSON file")
+    args = parser.parse_args()
+
+    spans = load_spans(args.traces)
+    if not spans:
+        parser.error("no spans in the trace files")
+    summary = summarize(spans)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
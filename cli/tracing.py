@@ -0,0 +1,117 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import uuid
+
+class Span:
+    """
+    One timed stage; fields set on it while it is open (bytes_out, cache_hit,
+    ...) are written with it.
+    """
+    def __init__(self, stage, fields):
+        self.stage = stage
+        self.fields = fields
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+class Tracer:
+    """
+    Appends spans to a JSONL trace file, one line per finished span:
+    {run_id, request_id, prompt_id, stage, start, end, duration, bytes_in,
+    bytes_out, cache_hit, error}. start and end are epoch seconds, so traces
+    from several processes can be merged. Safe to use from worker threads.
+    Without a path spans are timed but not written anywhere. Listeners
+    (see add_listener) see every span either way.
+    """
+    def __init__(self, path=None, run_id=None):
+        self.path = path
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.lock = threading.Lock()
+        self.file = open(path, "a") if path else None
+
+    @contextlib.contextmanager
+    def span(self, stage, request_id=None, prompt_id=None, **fields):
+        span = Span(stage, dict(fields))
+        for listener in _listeners:
+            listener.span_started(stage)
+        start = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            if self.file is not None or _listeners:
+                record = {
+                    "run_id": self.run_id,
+                    "request_id": request_id,
+                    "prompt_id": prompt_id,
+                    "stage": stage,
+                    "start": start,
+                    "end": start + elapsed,
+                    "duration": elapsed,
+                    "bytes_in": None,
+                    "bytes_out": None,
+                    "cache_hit": None,
+                    "error": error,
+                    "pid": os.getpid(),
+                }
+                record.update(span.fields)
+                for listener in _listeners:
+                    listener.span_finished(record)
+            if self.file is not None:
+                line = json.dumps(record) + "\n"
+                with self.lock:
+                    self.file.write(line)
+                    self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+_tracer = Tracer()
+_listeners = []
+
+def add_listener(listener):
+    """
+    Also report spans to listener, which has span_started(stage) and
+    span_finished(record) (e.g. metrics.registry). Listeners outlive configure().
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+def configure(path=None, run_id=None):
+    """
+    Send spans from this process to path (None turns tracing off); returns the tracer.
+    """
+    global _tracer
+    _tracer.close()
+    _tracer = Tracer(path, run_id)
+    return _tracer
+
+def span(stage, request_id=None, prompt_id=None, **fields):
+    """
+    Time a stage with the configured tracer:
+
+        with tracing.span("research", request_id=rid) as s:
+            ...
+            s.set(bytes_out=len(context), cache_hit=False)
+    """
+    return _tracer.span(stage, request_id, prompt_id, **fields)
+
+def num_bytes(value):
+    """
+    UTF-8 size of a string, or of the JSON encoding of anything else.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        value = json.dumps(value)
+    return len(value.encode("utf-8"))
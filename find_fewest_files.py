@@ -1,5 +1,14 @@
+import argparse
+import csv
+import glob
 import json
+import heapq
+import re
+import sys
+import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import os
 
 def flatten_facts(data):
@@ -19,7 +28,7 @@ def flatten_facts(data):
             print(f"Unknown format for question: {q}")
     return required_facts
 
-def select_min_doc_ids(required_facts):
+def build_fact_to_docs(required_facts):
     all_facts = []
 
     for kind, fact_dict in required_facts:
@@ -29,25 +38,315 @@ def select_min_doc_ids(required_facts):
         else:
             all_facts.extend(fact_dict.items())
 
-    fact_to_docs = {fact: set(docs) for fact, docs in all_facts if docs}
+    return {fact: set(docs) for fact, docs in all_facts if docs}
+
+def build_doc_to_facts(fact_to_docs):
+    """
+    Inverted index doc -> facts, plus each doc's first-seen rank for tie-breaking.
+    """
+    doc_to_facts = defaultdict(set)
+    doc_rank = {}
+    for fact, docs in fact_to_docs.items():
+        for doc in sorted(docs, key=str):
+            doc_to_facts[doc].add(fact)
+            doc_rank.setdefault(doc, len(doc_rank))
+    return doc_to_facts, doc_rank
+
+def select_min_doc_ids(required_facts):
+    """
+    Greedy set cover: repeatedly pick the doc covering the most uncovered facts.
+
+    Lazy greedy over a max-heap of coverage counts. Counts are kept exact by
+    decrementing them as facts get covered; heap entries whose count is stale
+    are re-pushed when they surface. Ties go to the doc seen first.
+    """
+    fact_to_docs = build_fact_to_docs(required_facts)
+    doc_to_facts, doc_rank = build_doc_to_facts(fact_to_docs)
+    coverage = {doc: len(facts) for doc, facts in doc_to_facts.items()}
+    heap = [(-count, doc_rank[doc], doc) for doc, count in coverage.items()]
+    heapq.heapify(heap)
+
     uncovered_facts = set(fact_to_docs.keys())
     selected_docs = set()
 
     while uncovered_facts:
-        doc_to_facts = defaultdict(set)
-        for fact in uncovered_facts:
-            for doc in fact_to_docs[fact]:
-                doc_to_facts[doc].add(fact)
+        neg_count, rank, doc = heapq.heappop(heap)
+        if -neg_count != coverage[doc]:
+            if coverage[doc] > 0:
+                heapq.heappush(heap, (-coverage[doc], rank, doc))
+            continue
 
-        best_doc = max(doc_to_facts.items(), key=lambda x: len(x[1]))[0]
-        selected_docs.add(best_doc)
-        uncovered_facts -= doc_to_facts[best_doc]
+        selected_docs.add(doc)
+        for fact in doc_to_facts[doc] & uncovered_facts:
+            uncovered_facts.discard(fact)
+            for other in fact_to_docs[fact]:
+                coverage[other] -= 1
 
     return selected_docs
 
+def build_requirements(required_facts):
+    """
+    Doc sets a cover must hit: one per AND fact, and one per OR group, which
+    any document of any of its alternatives satisfies.
+    """
+    and_facts = {}
+    or_groups = []
+    for kind, fact_dict in required_facts:
+        if kind == "OR":
+            docs = set()
+            for fact_docs in fact_dict.values():
+                docs.update(fact_docs or [])
+            if docs:
+                or_groups.append(docs)
+        else:
+            for fact, docs in fact_dict.items():
+                if docs:
+                    and_facts[fact] = set(docs)
+    return list(and_facts.values()) + or_groups
+
+def popcount(x):
+    return bin(x).count("1")
+
+def iter_bits(x):
+    while x:
+        low = x & -x
+        yield low.bit_length() - 1
+        x ^= low
+
+def reduce_requirements(requirements):
+    """
+    Apply reduction rules until none fires. Returns (forced_docs, requirements).
+
+    - a requirement with a single document forces that document;
+    - a requirement containing another one is implied by it and dropped;
+    - a document whose requirements are a subset of another document's is
+      dominated and dropped (of two equal documents the first by id is kept).
+    """
+    forced = set()
+    changed = True
+    while changed:
+        changed = False
+
+        singles = {next(iter(req)) for req in requirements if len(req) == 1}
+        if singles:
+            forced |= singles
+            requirements = [req for req in requirements if not req & forced]
+            changed = True
+
+        kept = []
+        for req in sorted(requirements, key=len):
+            if not any(other <= req for other in kept):
+                kept.append(req)
+        changed |= len(kept) != len(requirements)
+        requirements = kept
+
+        doc_reqs = defaultdict(set)
+        for i, req in enumerate(requirements):
+            for doc in req:
+                doc_reqs[doc].add(i)
+        dominated = set()
+        for doc, reqs in doc_reqs.items():
+            # Any dominating document also covers this document's first requirement.
+            for other in requirements[min(reqs)]:
+                if other == doc or other in dominated:
+                    continue
+                other_reqs = doc_reqs[other]
+                if reqs < other_reqs or (reqs == other_reqs and str(other) < str(doc)):
+                    dominated.add(doc)
+                    break
+        if dominated:
+            requirements = [req - dominated for req in requirements]
+            changed = True
+
+    return forced, requirements
+
+def select_min_doc_ids_exact(required_facts, time_budget=60.0):
+    """
+    Smallest set of documents covering every required fact.
+
+    The instance is shrunk with reduce_requirements and then solved by
+    depth-first branch-and-bound with requirements as bitsets, starting from
+    the greedy cover. The bound counts requirements that no single document
+    can cover together. If time_budget seconds run out, the best cover found
+    so far is returned.
+
+    Returns (selected_docs, lower_bound); the cover is proven optimal when
+    len(selected_docs) == lower_bound.
+    """
+    deadline = time.monotonic() + time_budget
+    forced, requirements = reduce_requirements(build_requirements(required_facts))
+
+    masks = defaultdict(int)
+    for i, req in enumerate(requirements):
+        for doc in req:
+            masks[doc] |= 1 << i
+    req_docs = [sorted(req, key=str) for req in requirements]
+    # Requirements that share a document with requirement i (including i).
+    conflicts = [0] * len(requirements)
+    for i, req in enumerate(requirements):
+        for doc in req:
+            conflicts[i] |= masks[doc]
+
+    def lower_bound(uncovered):
+        count = 0
+        while uncovered:
+            i = (uncovered & -uncovered).bit_length() - 1
+            uncovered &= ~conflicts[i]
+            count += 1
+        return count
+
+    full = (1 << len(requirements)) - 1
+    best = []
+    uncovered = full
+    while uncovered:
+        doc = max(sorted(masks, key=str), key=lambda d: popcount(masks[d] & uncovered))
+        best.append(doc)
+        uncovered &= ~masks[doc]
+    root_bound = lower_bound(full)
+
+    def branches(uncovered):
+        # Branch on the uncovered requirement with the fewest documents.
+        i = min(iter_bits(uncovered), key=lambda j: len(req_docs[j]))
+        return iter(sorted(req_docs[i], key=lambda d: -popcount(masks[d] & uncovered)))
+
+    timed_out = False
+    chosen = []
+    stack = [(full, branches(full))] if full and root_bound < len(best) else []
+    while stack:
+        if time.monotonic() > deadline:
+            timed_out = True
+            break
+        uncovered, candidates = stack[-1]
+        doc = next(candidates, None)
+        if doc is None:
+            stack.pop()
+            if chosen:
+                chosen.pop()
+            continue
+        remaining = uncovered & ~masks[doc]
+        if not remaining:
+            if len(chosen) + 1 < len(best):
+                best = chosen + [doc]
+            continue
+        if len(chosen) + 1 + lower_bound(remaining) >= len(best):
+            continue
+        chosen.append(doc)
+        stack.append((remaining, branches(remaining)))
+
+    selected_docs = forced | set(best)
+    bound = len(forced) + root_bound if timed_out else len(selected_docs)
+    return selected_docs, bound
+
+def build_incidence(fact_to_docs):
+    """
+    Sparse fact x doc incidence matrix (CSR) with columns in first-seen doc order.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    _, doc_rank = build_doc_to_facts(fact_to_docs)
+    rows = []
+    cols = []
+    for row, docs in enumerate(fact_to_docs.values()):
+        for doc in docs:
+            rows.append(row)
+            cols.append(doc_rank[doc])
+    doc_ids = sorted(doc_rank, key=doc_rank.get)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int8), (rows, cols)),
+        shape=(len(fact_to_docs), len(doc_ids))
+    )
+    return matrix, doc_ids
+
+def select_min_doc_ids_sparse(matrix, doc_ids):
+    """
+    select_min_doc_ids over an incidence matrix; picks the same documents.
+
+    Coverage counts live in a NumPy array; after each pick the facts it newly
+    covers are subtracted from the counts of every document containing them.
+    """
+    import numpy as np
+
+    csc = matrix.tocsc()
+    coverage = np.diff(csc.indptr).astype(np.int64)
+    uncovered = np.ones(matrix.shape[0], dtype=bool)
+    remaining = matrix.shape[0]
+    selected = []
+    while remaining:
+        # argmax returns the first maximum, i.e. the doc seen first.
+        best = int(np.argmax(coverage))
+        rows = csc.indices[csc.indptr[best]:csc.indptr[best + 1]]
+        rows = rows[uncovered[rows]]
+        uncovered[rows] = False
+        remaining -= len(rows)
+        coverage -= np.bincount(matrix[rows].indices, minlength=len(coverage))
+        selected.append(doc_ids[best])
+    return set(selected)
+
+def solve_nuggets_file(file_path, exact=False, time_budget=60.0):
+    """
+    Solve one nuggets file; returns a result record for the batch output.
+    """
+    start = time.perf_counter()
+    with open(file_path) as f:
+        data = json.load(f)
+    required_facts = flatten_facts(data)
+    lower_bound = None
+    if exact:
+        doc_ids, lower_bound = select_min_doc_ids_exact(required_facts, time_budget)
+    else:
+        matrix, all_doc_ids = build_incidence(build_fact_to_docs(required_facts))
+        doc_ids = select_min_doc_ids_sparse(matrix, all_doc_ids)
+
+    match = re.match(r"nuggets_([^_]+)_(.+)\.json$", os.path.basename(file_path))
+    return {
+        "lang": match.group(1) if match else None,
+        "topic_id": match.group(2) if match else None,
+        "file": file_path,
+        "num_docs": len(doc_ids),
+        "lower_bound": lower_bound,
+        "doc_ids": sorted(doc_ids),
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+
+def solve_batch(file_paths, output_prefix, jobs=None, exact=False, time_budget=60.0):
+    """
+    Solve many nuggets files across a process pool and write PREFIX.json and PREFIX.csv.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(partial(solve_nuggets_file, exact=exact, time_budget=time_budget), file_paths))
+
+    with open(f"{output_prefix}.json", "w") as f:
+        json.dump(results, f, indent=2)
+    with open(f"{output_prefix}.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["lang", "topic_id", "file", "num_docs", "lower_bound", "seconds", "doc_ids"])
+        writer.writeheader()
+        for result in results:
+            writer.writerow({**result, "doc_ids": " ".join(result["doc_ids"])})
+    return results
+
 # === MAIN ===
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--exact", action="store_true", help="solve for the smallest cover instead of the greedy one")
+    parser.add_argument("--time-budget", type=float, default=60.0, help="seconds per file for --exact before settling for the best cover found")
+    parser.add_argument("--batch", nargs="?", const="", metavar="GLOB", help="solve every nuggets file matching GLOB (default: all files in base_dir) in parallel")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes for --batch")
+    parser.add_argument("--output", default="minimal_doc_ids", help="--batch writes OUTPUT.json and OUTPUT.csv")
+    args = parser.parse_args()
+
     base_dir = "/exp/scale25/neuclir/eval/nuggets/individual_lang"
+
+    if args.batch is not None:
+        pattern = args.batch or os.path.join(base_dir, "nuggets_*.json")
+        file_paths = sorted(glob.glob(pattern))
+        print(f"📂 Solving {len(file_paths)} files matching {pattern}")
+        start = time.perf_counter()
+        results = solve_batch(file_paths, args.output, args.jobs, args.exact, args.time_budget)
+        for result in results:
+            print(f"✅ {result['lang']}-{result['topic_id']}: {result['num_docs']} documents in {result['seconds']:.2f} s")
+        print(f"Wrote {args.output}.json and {args.output}.csv in {time.perf_counter() - start:.1f} s")
+        sys.exit(0)
     langs = ['zho', 'fas', 'rus']
     #ids = [324, 361, 387]
     ids = [300, 303, 308, 309, 310, 334, 335, 343, 351, 352, 365, 367, 372, 373, 377, 380, 382, 383, 388
@@ -67,7 +366,14 @@ if __name__ == "__main__":
                 data = json.load(f)
 
             required_facts = flatten_facts(data)
-            minimal_doc_ids = select_min_doc_ids(required_facts)
+            if args.exact:
+                minimal_doc_ids, lower_bound = select_min_doc_ids_exact(required_facts, args.time_budget)
+                if len(minimal_doc_ids) == lower_bound:
+                    print(f"Optimal cover of {len(minimal_doc_ids)} documents")
+                else:
+                    print(f"⏱ Time budget reached: {len(minimal_doc_ids)} documents, lower bound {lower_bound} (gap {len(minimal_doc_ids) - lower_bound})")
+            else:
+                minimal_doc_ids = select_min_doc_ids(required_facts)
 
             print(f"✅ Minimal document IDs for {lang}-{req_id}:")
             for doc_id in sorted(minimal_doc_ids):
@@ -1,21 +1,28 @@
 # to run
 # python prompt_engineer_experiment.py ../config.local.Llama-3.3-70B-Instruct.json example-request-3.jsonl output_new.json
+# (add --refresh-research to redo research that is already in the cache)
+# (add --metrics-port 9100 to watch progress at http://127.0.0.1:9100/metrics)
 #
 #
 
-from gpt_researcher import GPTResearcher
-from gpt_researcher.utils import output 
 import asyncio
 from typing import Dict, Any
 from dotenv import load_dotenv
 load_dotenv()
+import argparse
 import logging
 import sys
 import json
 import os
 import time
-import pandas as pd
-import itertools
+from cli.prompt_generator import PromptSpace
+from cli.research_cache import ResearchCache
+from cli.llm_cache import LLMCache
+from cli.checkpoint import Checkpoint, iter_requests
+from cli.report_generator import conduct_research
+from cli.backend import load_backend
+from cli import tracing
+from cli import metrics
 
 # TODO: make a permanent path for INSTRUCTION_JSON
 
@@ -26,89 +33,6 @@ num_to_generate = 2 # Number of prompts to generate for each request
 with open(INSTRUCTION_JSON, "r") as f:
     instructions = json.load(f)
 
-total_words_options = instructions["total_words_options"]
-focus_instructions = instructions["focus_instructions"]
-structure_instructions = instructions["structure_instructions"]
-fact_instructions = instructions["fact_instructions"]
-length_instructions = instructions["length_instructions"]
-depth_instructions = instructions["depth_instructions"]
-opinion_instructions = instructions["opinion_instructions"]
-bias_instructions = instructions["bias_instructions"]
-citation_instructions = instructions["citation_instructions"]
-tone_instructions = instructions["tone_instructions"]
-formatting_instructions = instructions["formatting_instructions"]
-extra_instructions = instructions["extra_instructions"]
-
-# -- Step 2: Create Prompt Variants DataFrame
-def build_prompt(combo):
-    (
-        total_words,
-        focus_instruction,
-        structure_instruction,
-        fact_instruction,
-        length_instruction,
-        depth_instruction,
-        opinion_instruction,
-        bias_instruction,
-        citation_instruction,
-        tone_instruction,
-        formatting_instruction,
-        extra_instruction
-    ) = combo
-
-    prompt = f"""
-Report Requirements:
-- {focus_instruction}
-- {structure_instruction}
-- {fact_instruction}
-- {length_instruction.replace('{total_words}', str(total_words))}
-- {depth_instruction}
-- {opinion_instruction}
-- {bias_instruction}
-- {citation_instruction}
-- {tone_instruction}
-- {formatting_instruction}
-- {extra_instruction}
-""".strip()
-    return prompt
-
-def generate_prompt_df() -> pd.DataFrame:
-    all_combinations = list(itertools.product(
-        total_words_options,
-        focus_instructions,
-        structure_instructions,
-        fact_instructions,
-        length_instructions,
-        depth_instructions,
-        opinion_instructions,
-        bias_instructions,
-        citation_instructions,
-        tone_instructions,
-        formatting_instructions,
-        extra_instructions
-    ))
-    prompt_variants = []
-    for i, combo in enumerate(all_combinations):
-        prompt_text = build_prompt(combo)
-        prompt_variants.append({
-            "id": f"prompt_{i+1}",
-            "total_words": combo[0],
-            "focus_instruction": combo[1],
-            "structure_instruction": combo[2],
-            "fact_instruction": combo[3],
-            "length_instruction": combo[4],
-            "depth_instruction": combo[5],
-            "opinion_instruction": combo[6],
-            "bias_instruction": combo[7],
-            "citation_instruction": combo[8],
-            "tone_instruction": combo[9],
-            "formatting_instruction": combo[10],
-            "extra_instruction": combo[11],
-            "prompt_text": prompt_text
-        })
-    prompt_df = pd.DataFrame(prompt_variants)
-    return prompt_df
-
 # Step 3: Custom Logs Handler
 class CustomLogsHandler:
     """A custom Logs handler class to handle JSON data."""
@@ -120,35 +44,30 @@ class CustomLogsHandler:
         if data['type'] == 'logs':
             self.logs.append(data)  # Append data to logs
 
-# Step 4: Extract Titles and Passages from Context
-def extract_titles_passages(context, doc_dict):
-    passages = []
-    for item in context.replace('\n',' ').split('Source:'):
-        fields = item.split('Content:')
-        if len(fields) == 2:
-            if 'Title:' in fields[0]:
-                docid, title = fields[0].strip().split('Title:')
-                title = title.strip()
-                docid = docid.strip()
-            else:
-                docid = fields[0].strip()
-                title = ""
-                
-            if docid in doc_dict:
-                docid = doc_dict[docid]
-            passage = fields[1].strip()
-            passages.append({'docid':docid.strip(), 'title':title, 'passage':passage})
-    return passages
-
 # Step 5: Asynchronous Function to Get Report Phase 
-async def get_report_phase1(query: str, background: str, report_type: str, config_file: str) -> str:
+# Research results are cached on disk, so rerunning a prompt sweep only pays for write_report.
+async def get_report_phase1(query: str, background: str, report_type: str, config_file: str, cache: ResearchCache = None, request_id: str = None) -> str:
     custom_logs_handler = CustomLogsHandler()
-    researcher = GPTResearcher(query, background, report_type, websocket=custom_logs_handler, config_path=config_file)
+    researcher = metrics.track_costs(load_backend(config_file).GPTResearcher(query, background, report_type, websocket=custom_logs_handler, config_path=config_file))
 
-    context, doc_dict = await researcher.conduct_research()
-    passages = extract_titles_passages(context, doc_dict)
+    context, doc_dict, passages = await conduct_research(researcher, query, background, report_type, config_file, cache, request_id)
     return researcher, custom_logs_handler.logs, passages, context, doc_dict
 
+# Reports for a prompt/context pair that was already written are served from the LLM cache.
+async def write_report(researcher, prompt_text: Dict[str, str], context, cache: LLMCache = None, request_id: str = None, prompt_id: str = None) -> str:
+    with tracing.span("write_report", request_id, prompt_id, bytes_in=tracing.num_bytes([prompt_text, context])) as span:
+        report = None
+        if cache is not None:
+            key = cache.key("write_report", json.dumps([prompt_text, context], sort_keys=True))
+            report = cache.get(key)
+        span.set(cache_hit=None if cache is None else report is not None)
+        if report is None:
+            report = await researcher.write_report(custom_prompt=prompt_text)
+            if cache is not None:
+                cache.put(key, report)
+        span.set(bytes_out=tracing.num_bytes(report))
+    return report
+
 
 #Step 6: Main Execution Block
 
@@ -158,83 +77,127 @@ if __name__ == "__main__":
     team_id = "hltcoe"
     task = "multilingual"
 
-    config_file = sys.argv[1]
-    input_file = sys.argv[2]
-    output_file = sys.argv[3]
-    if len(sys.argv) >= 5:
-        run_name = sys.argv[4]
-    else:
-        run_name = f'{report_type}_{time.time()}'
+    parser = argparse.ArgumentParser()
+    parser.add_argument("config_file")
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument("run_name", nargs="?", default=f'{report_type}_{time.time()}', help="pass the same name when resuming")
+    parser.add_argument("--resume", action="store_true", help="skip work recorded in OUTPUT_FILE.checkpoint and append to existing outputs")
+    parser.add_argument("--research-cache", default=".research_cache", help="directory for cached research results")
+    parser.add_argument("--research-cache-mb", type=int, default=1024, help="evict cached research beyond this size")
+    parser.add_argument("--no-research-cache", action="store_true")
+    parser.add_argument("--refresh-research", action="store_true", help="redo research and overwrite cached results")
+    parser.add_argument("--llm-cache", default=".llm_cache.sqlite", help="SQLite file for cached LLM responses")
+    parser.add_argument("--llm-cache-entries", type=int, default=100000, help="evict least recently used responses beyond this count")
+    parser.add_argument("--llm-cache-ttl", type=float, default=None, help="ignore cached responses older than this many seconds")
+    parser.add_argument("--bypass-llm-cache", action="store_true", help="always regenerate, e.g. for sampling runs with temperature > 0")
+    parser.add_argument("--trace", default=None, help="append per-stage timing spans to this JSONL file (see cli/trace_analyzer.py)")
+    parser.add_argument("--metrics-port", type=int, default=None, help="serve Prometheus-text metrics on this local port")
+    args = parser.parse_args()
+
+    config_file = args.config_file
+    input_file = args.input_file
+    output_file = args.output_file
+    run_name = args.run_name
+    research_cache = None
+    if not args.no_research_cache:
+        research_cache = ResearchCache(args.research_cache, args.research_cache_mb * 2**20, refresh=args.refresh_research)
+    llm_cache = LLMCache(args.llm_cache, config_file, args.llm_cache_entries, args.llm_cache_ttl, bypass=args.bypass_llm_cache)
+    # "backend": "mock" in the config swaps GPTResearcher for the offline stand-in in cli/mock_backend
+    backend = load_backend(config_file)
+    tracer = tracing.configure(args.trace, run_id=run_name)
+    if args.metrics_port is not None:
+        metrics.serve(args.metrics_port)
     ddir = os.path.dirname(os.path.realpath(__file__))
 
     metadata = {'team_id':team_id, 'run_id':run_name, 'task':task}
 
-# This is the second command-line argument (sys.argv[2]) passed to the script when it is executed. It specifies the path to the input JSONL file (e.g., example-request-3.jsonl).
-    data = []
-    with open(input_file) as F:
-        for line in F:
-            data.append(json.loads(line))
-
+    # Completed (request_id, prompt_id) pairs are recorded as they finish, so --resume only redoes missing work.
+    checkpoint = Checkpoint(f'{output_file}.checkpoint', resume=args.resume)
+    output_mode = 'a' if args.resume else 'w'
 
-
-# Step 7: Generate Prompt Variants DataFrame
-    prompt_df = generate_prompt_df()
-    print(f"Total prompts generated: {len(prompt_df)}")
-    # Optionally sample or select a subset for generation
-    selected_prompts = prompt_df.sample(n=min(num_to_generate, len(prompt_df)), random_state=42)
+# Step 7: Sample Prompt Variants
+    # Variants are addressed by index, so only the sampled prompts are ever rendered.
+    prompt_space = PromptSpace(instructions)
+    print(f"Total prompt variants: {len(prompt_space)}")
+    selected_prompts = prompt_space.sample(num_to_generate, random_state=42)
 
     OUTPUT_FILES = {}
     OUTPUT_LOGS = {}
     for idx, row in selected_prompts.iterrows():
-        OUTPUT_FILES[idx] = open(f'{row["id"]}.{output_file}','w')
-        OUTPUT_LOGS[idx] = open(f'{row["id"]}.{output_file}.log','w')
+        OUTPUT_FILES[idx] = open(f'{row["id"]}.{output_file}', output_mode)
+        OUTPUT_LOGS[idx] = open(f'{row["id"]}.{output_file}.log', output_mode)
         print(f'-------- {row["id"]} --------\n{row["prompt_text"]}')
 
     loop = asyncio.get_event_loop()
-    for i, d in enumerate(data):
+    # The input file (sys.argv[2], e.g. example-request-3.jsonl) is streamed one request at a time.
+    for i, d in enumerate(iter_requests(input_file)):
+        pending_prompts = [
+            (idx, row) for idx, row in selected_prompts.iterrows()
+            if not checkpoint.is_done(d['request_id'], row['id'])
+        ]
+        if not pending_prompts:
+            print(f"Skipping request {i} request_id:{d['request_id']}: already completed")
+            continue
+
         print(f"\n============ request {i} request_id:{d['request_id']} ==============")
         query = d["problem_statement"]
         background = d["background"]
 
-        researcher, logs, passages, context, doc_dict = loop.run_until_complete(get_report_phase1(query, background, report_type, config_file))
+        try:
+            researcher, logs, passages, context, doc_dict = loop.run_until_complete(get_report_phase1(query, background, report_type, config_file, research_cache, d['request_id']))
 
-        for idx, row in selected_prompts.iterrows():
-            print(f"\nGenerating report for prompt {row['id']}:")
-            prompt_text = {}
-            prompt_text["pre"] = f'''
+            for n, (idx, row) in enumerate(pending_prompts):
+                metrics.set_gauge("scale_queue_depth", len(pending_prompts) - n - 1, queue="prompts")
+                print(f"\nGenerating report for prompt {row['id']}:")
+                prompt_text = {}
+                prompt_text["pre"] = f'''
 Query: "{query}"
 ---
 '''
             
-            prompt_text["post"] = f'''
+                prompt_text["post"] = f'''
 Using the above information, provide supporting facts for the query: "{background}"
 
 {row["prompt_text"]}
 '''
 
-            start_time = time.time()
+                start_time = time.time()
 
-            report = loop.run_until_complete(researcher.write_report(custom_prompt=prompt_text))            
-            elapsed_time = time.time() - start_time
+                report = loop.run_until_complete(write_report(researcher, prompt_text, context, llm_cache, d['request_id'], row['id']))
+                elapsed_time = time.time() - start_time
 
-            d['passages'] = passages
-            d['logs'] = logs
-            d['report'] = report
-            d['doc_dict'] = doc_dict
-            d['context'] = context
-            metadata['topic_id'] = d['request_id']
+                d['passages'] = passages
+                d['logs'] = logs
+                d['report'] = report
+                d['doc_dict'] = doc_dict
+                d['context'] = context
+                metadata['topic_id'] = d['request_id']
 
-            trec_report = output.get_trec_format(metadata, report, passages)
-            OUTPUT_FILES[idx].write(json.dumps(trec_report)+'\n')
+                trec_report = backend.get_trec_format(metadata, report, passages)
+                OUTPUT_FILES[idx].write(json.dumps(trec_report)+'\n')
 
-            d['report_length_by_char'] =  sum([len(t["text"]) for t in trec_report["responses"]])
-            OUTPUT_LOGS[idx].write(json.dumps(d)+'\n')
+                d['report_length_by_char'] =  sum([len(t["text"]) for t in trec_report["responses"]])
+                OUTPUT_LOGS[idx].write(json.dumps(d)+'\n')
 
-            print(f"========== request {i} {row['id']} report finished in {elapsed_time:.0f} seconds; report length: {d['report_length_by_char']} chars =========\n")
-            OUTPUT_LOGS[idx].flush()
-            OUTPUT_FILES[idx].flush()
-            sys.stdout.flush()
+                print(f"========== request {i} {row['id']} report finished in {elapsed_time:.0f} seconds; report length: {d['report_length_by_char']} chars =========\n")
+                OUTPUT_LOGS[idx].flush()
+                OUTPUT_FILES[idx].flush()
+                sys.stdout.flush()
+                checkpoint.mark_done(d['request_id'], row['id'])
+        except Exception as e:
+            # Prompts already written stay checkpointed; --resume retries the rest
+            print(f"========== request {i} request_id:{d['request_id']} failed: {type(e).__name__}: {e} =========\n")
+            metrics.inc("scale_requests_total", status="failed")
+            continue
+        metrics.inc("scale_requests_total", status="completed")
 
     for idx, row in selected_prompts.iterrows():
         OUTPUT_FILES[idx].close()
         OUTPUT_LOGS[idx].close()
+
+    checkpoint.close()
+
+    print(f"LLM cache: {llm_cache.stats()}")
+    llm_cache.close()
+    tracer.close()
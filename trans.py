@@ -1,54 +1,221 @@
 import os
-import subprocess
+import argparse
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from trans_shell_single_final import iter_chunks, pack_chunks, MAX_CHUNK_SIZE
+from translation_memory import TranslationMemory, DEFAULT_MAX_ENTRIES
+from translation_backends import add_translator_arguments, make_translator
+from translation_manifest import TranslationManifest, file_hash, write_atomic
+from cli import tracing
 
 translator = 'google'
 target_lang = 'en'  # All texts will be translated to English
+MAX_WORKERS = 8  # Concurrent translate-shell processes
+MAX_FILES_IN_FLIGHT = 16  # Files chunked and queued ahead of the ones being written
+MANIFEST_SAVE_EVERY = 10  # Files written between manifest saves, so a crash loses little
+MAX_RETRIES = 3
+# Full (non -b) translate-shell output, so not shared with trans_shell_single_final.py's memory.
+TRANSLATION_MEMORY = 'translation_memory.sqlite'
+TRANSLATION_MANIFEST = 'translation_manifest.json'
+LANGUAGES = ['fas', 'rus', 'zho']
 
-def read_input(filepath):
+def read_chunks(filepath):
+    """Stream a file through the chunker; returns (chunks, characters covered)"""
+    length = 0
+    chunks = []
     with open(filepath, 'r', encoding='utf-8') as f:
-        return f.read()
+        for chunk, start, end in iter_chunks(f, MAX_CHUNK_SIZE):
+            chunks.append(chunk)
+            length = end
+    return pack_chunks(chunks, MAX_CHUNK_SIZE), length
 
-def translate_text(text, translator, target_lang):
-    #cmd = ['trans', f'--translators={translator}', '-b', f':{target_lang}', text]
-    cmd = ['trans', f'--translators={translator}', f':{target_lang}', text]
-    result = subprocess.run(cmd, capture_output=True, text=True)
+def translate_text(text, translator, target_lang, memory=None, request_id=None):
+    with tracing.span("translate", request_id, bytes_in=tracing.num_bytes(text)) as span:
+        translated = None
+        if memory is not None:
+            translated = memory.get(text, translator.name, target_lang)
+        span.set(cache_hit=None if memory is None else translated is not None)
+        if translated is None:
+            translated = translator.translate(text, target_lang)
+            if memory is not None:
+                memory.put(text, translator.name, target_lang, translated)
+        span.set(bytes_out=tracing.num_bytes(translated))
+    return translated
 
-    if result.returncode != 0:
-        raise RuntimeError(f"[{translator}] Translate Shell error: {result.stderr.strip()}")
+def translate_chunk(chunk, translator, target_lang, retries=MAX_RETRIES, memory=None, request_id=None):
+    """Translate one chunk, retrying it on its own with backoff if translate-shell fails
 
-    return result.stdout.strip()
+    OSErrors (e.g. no trans binary) are not retried; they fail the chunk at once.
+    """
+    for attempt in range(1, retries + 1):
+        try:
+            return translate_text(chunk, translator, target_lang, memory, request_id)
+        except RuntimeError as e:
+            if attempt == retries:
+                raise
+            print(f"Retrying chunk after attempt {attempt}/{retries} failed: {e}")
+            time.sleep(2 ** attempt)
 
 def write_output(filepath, translated_text):
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(translated_text)
+    write_atomic(filepath, translated_text)
+
+def iter_folder(input_folder, output_folder, translator, limit=None, manifest=None):
+    """Yield (input path, output path, stat, sha256) for each file in the folder to translate
 
-def process_folder(input_folder, output_folder, limit=None):
+    Files are listed lazily, so only the ones being translated are held in
+    memory. With a manifest, files already translated and unchanged since are
+    skipped and do not count towards limit.
+    """
     os.makedirs(output_folder, exist_ok=True)
 
-    count = 0
-    for filename in os.listdir(input_folder):
-        if filename.endswith('.txt'):
-            if limit is not None and count >= limit:
+    queued = 0
+    skipped = 0
+    with os.scandir(input_folder) as entries:
+        for entry in entries:
+            if not (entry.name.endswith('.txt') and entry.is_file()):
+                continue
+            if limit is not None and queued >= limit:
                 break
 
-            input_path = os.path.join(input_folder, filename)
-            base_name = os.path.splitext(filename)[0]
-            output_filename = f"{base_name}_{translator}.txt"
+            base_name = os.path.splitext(entry.name)[0]
+            output_filename = f"{base_name}_{translator.name}.txt"
             output_path = os.path.join(output_folder, output_filename)
+            if manifest is not None and manifest.is_current(entry, output_path):
+                skipped += 1
+                continue
+
+            # Taken before reading, so a file edited mid-run is picked up again next time
+            stat = entry.stat()
+            sha256 = file_hash(entry.path) if manifest is not None else None
+            queued += 1
+            yield entry.path, output_path, stat, sha256
+    if skipped:
+        print(f"Skipped {skipped} unchanged files in {input_folder}")
+
+def submit_file(job, pool, translator, memory=None):
+    """Chunk one file and queue its chunks on the pool; returns the pending file"""
+    input_path, output_path, stat, sha256 = job
+    chunks, length = read_chunks(input_path)
+    print(f"Translating {input_path} ({len(chunks)} chunks)...")
+    futures = [pool.submit(translate_chunk, chunk, translator, target_lang, memory=memory, request_id=input_path) for chunk in chunks]
+    return input_path, output_path, length, futures, stat, sha256
+
+def finish_file(pending_file, manifest=None):
+    """Reassemble a file's translated chunks in order and write it; returns its characters
+
+    A file translated without errors is recorded in the manifest.
+    """
+    input_path, output_path, length, futures, stat, sha256 = pending_file
+    translated_chunks = []
+    failed = False
+    for i, future in enumerate(futures, 1):
+        try:
+            translated_chunks.append(future.result())
+        except (RuntimeError, OSError) as e:
+            print(f"Error translating chunk {i} of {input_path}: {e}")
+            translated_chunks.append(f"[TRANSLATION FAILED FOR CHUNK {i}]")
+            failed = True
+    write_output(output_path, "\n".join(translated_chunks))
+    print(f"Saved translated file to {output_path}")
+    if manifest is not None and not failed:
+        manifest.record(input_path, output_path, stat, sha256)
+    return length
 
-            print(f"Translating {input_path}...")
-            original_text = read_input(input_path)
-            translated_text = translate_text(original_text, translator, target_lang)
-            write_output(output_path, translated_text)
-            print(f"Saved translated file to {output_path}")
+def translate_files(jobs, translator, workers=MAX_WORKERS, window=MAX_FILES_IN_FLIGHT, memory=None, manifest=None):
+    """Translate (label, job) pairs from iter_folder; yields (label, characters) as each file is written
 
-            count += 1
+    Chunks of up to window files are queued on one pool at a time, and a file
+    is written as soon as all of its chunks are back, so memory stays bounded
+    however many files there are. The manifest is saved every
+    MANIFEST_SAVE_EVERY files and when translation stops, even on an error.
+    """
+    jobs = iter(jobs)
+    in_flight = []
+    written = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                while len(in_flight) < window:
+                    job = next(jobs, None)
+                    if job is None:
+                        break
+                    label, job = job
+                    in_flight.append((label, submit_file(job, pool, translator, memory)))
+                if not in_flight:
+                    break
+
+                # Sleep until another chunk finishes, unless a file is already complete
+                if not any(all(future.done() for future in pending_file[3]) for _, pending_file in in_flight):
+                    running = [future for _, pending_file in in_flight for future in pending_file[3] if not future.done()]
+                    wait(running, return_when=FIRST_COMPLETED)
+                still_running = []
+                for label, pending_file in in_flight:
+                    if all(future.done() for future in pending_file[3]):
+                        length = finish_file(pending_file, manifest)
+                        written += 1
+                        if manifest is not None and written % MANIFEST_SAVE_EVERY == 0:
+                            manifest.save()
+                        yield label, length
+                    else:
+                        still_running.append((label, pending_file))
+                in_flight = still_running
+    finally:
+        if manifest is not None:
+            manifest.save()
+
+def process_folder(input_folder, output_folder, translator, limit=None, workers=MAX_WORKERS, memory=None, manifest=None):
+    """Translate one folder; returns (files, characters)"""
+    jobs = ((None, job) for job in iter_folder(input_folder, output_folder, translator, limit, manifest))
+    files = chars = 0
+    for _, length in translate_files(jobs, translator, workers, memory=memory, manifest=manifest):
+        files += 1
+        chars += length
+    return files, chars
 
 def main():
-    for lang in ['fas', 'rus', 'zho']:
-        input_folder = os.path.join('..', lang)
-        output_folder = os.path.join('..', f"{lang}_{translator}")
-        process_folder(input_folder, output_folder, limit=3)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help='concurrent translation calls')
+    parser.add_argument('--files-in-flight', type=int, default=MAX_FILES_IN_FLIGHT, help='files chunked and queued at once')
+    parser.add_argument('--limit', type=int, default=3, help='files per language to translate per run (0 for no limit)')
+    parser.add_argument('--memory', default=TRANSLATION_MEMORY, help='translation memory file')
+    parser.add_argument('--memory-entries', type=int, default=DEFAULT_MAX_ENTRIES, help='evict least recently used translations beyond this count')
+    parser.add_argument('--no-memory', action='store_true', help='always call the translation backend')
+    parser.add_argument('--manifest', default=TRANSLATION_MANIFEST, help='record of translated files, used to skip unchanged ones')
+    parser.add_argument('--no-manifest', action='store_true', help='translate every file, even if unchanged')
+    parser.add_argument('--trace', default=None, help='append per-chunk timing spans to this JSONL file (see cli/trace_analyzer.py)')
+    add_translator_arguments(parser)
+    args = parser.parse_args()
+    backend = make_translator(args, translator)
+    manifest = None if args.no_manifest else TranslationManifest(args.manifest)
+    tracer = tracing.configure(args.trace)
+    memory = None if args.no_memory else TranslationMemory(args.memory, args.memory_entries)
+
+    # All languages share one pool, so their chunks are translated concurrently.
+    def jobs():
+        for lang in LANGUAGES:
+            input_folder = os.path.join('..', lang)
+            output_folder = os.path.join('..', f"{lang}_{backend.name}")
+            for job in iter_folder(input_folder, output_folder, backend, limit=args.limit or None, manifest=manifest):
+                yield lang, job
+
+    start_time = time.time()
+    totals = {lang: [0, 0, 0.0] for lang in LANGUAGES}  # files, characters, seconds until the last one was written
+    for lang, length in translate_files(jobs(), backend, args.workers, args.files_in_flight, memory, manifest):
+        totals[lang][0] += 1
+        totals[lang][1] += length
+        totals[lang][2] = time.time() - start_time
+
+    for lang, (files, chars, elapsed_time) in totals.items():
+        elapsed_time = max(elapsed_time, 1e-6)
+        print(f"{lang}: {files} files, {chars} characters in {elapsed_time:.1f} seconds "
+              f"({files / elapsed_time:.2f} files/s, {chars / elapsed_time:.0f} chars/s)")
+
+    if memory is not None:
+        print(f"Translation memory: {memory.stats()}")
+        memory.close()
+    backend.close()
+    tracer.close()
 
 if __name__ == '__main__':
     main()
@@ -1,118 +1,276 @@
 #Final version of this script to test for the trans_shell script. Uses Google Translate via Translate Shell. Splits text into chunks <2000 characters. Input is a hardcoded text string. Output is a single line of text.   
 
-import subprocess
+import argparse
+import asyncio
 import re
 
+from translation_memory import TranslationMemory
+from translation_backends import AsyncTranslator, add_translator_arguments, make_translator
+from cli import tracing
+
 # Configuration
 translator = 'google'
 target_lang = 'en'
 MAX_CHUNK_SIZE = 2000
+TRANSLATION_MEMORY = 'translation_memory_brief.sqlite'  # -b output, kept apart from trans.py's memory
+READ_BLOCK_SIZE = 1 << 20  # Characters read at a time when chunking a file
+PARAGRAPH_PATTERN = re.compile(r'\n\s*\n|\s{4,}')
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+')
+BATCH_SIZE = 8  # Chunks sent per backend call
 
 # Your text to translate
 text_to_translate = '''Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.Экс-госсекретарь США Кондолиза Райс дала интервью для проекта Блестящие умы Стэнфорда и Кремниевой долины, опубликованном в украинском издании Новое время, в котором она изложила свою точку зрения на место Украины в глобальной политике    Фото со страницы Condoleezza Rice в twitter    Беседу провели замминистра экономразвития Украины Наталья Микольская и известный в западных кругах философ Фрэнсис Фукуяма.    О смене власти на Украине    Райс первым делом обратила внимание на то, что в стране впервые за долгое время состоялся мирный переход от одного президента к другому.    В Украине это случалось несколько раз, но также были и несколько революций. И я сказала своим украинским коллегам: уже пора начать управлять.    Она выразила надежду, что на Украине продолжится борьба с коррупцией, развитие экономики и просвещение граждан, которое, с ее точки зрения, длилось в последние годы.'''
 
-def split_text_smart(text, max_size=MAX_CHUNK_SIZE):
-    """Split text into chunks at natural breakpoints (sentences, paragraphs)"""
-    if len(text) <= max_size:
-        return [text]
-    
-    chunks = []
-    current_chunk = ""
-    
-    # Split by paragraphs first (double spaces or newlines)
-    paragraphs = re.split(r'\n\s*\n|\s{4,}', text)
-    
-    for paragraph in paragraphs:
-        paragraph = paragraph.strip()
-        if not paragraph:
-            continue
-            
+def _strip_span(raw, start):
+    """Strip raw (found at offset start) and return (text, start, end) of what is left"""
+    text = raw.strip()
+    start += len(raw) - len(raw.lstrip())
+    return text, start, start + len(text)
+
+def _join_span(parts, start, end):
+    """Join chunk parts spanning [start, end) with spaces, strip, and fix up the offsets"""
+    joined = " ".join(parts)
+    chunk = joined.strip()
+    return chunk, start + len(joined) - len(joined.lstrip()), end - (len(joined) - len(joined.rstrip()))
+
+def _iter_paragraphs(buffer, reader=None, block_size=READ_BLOCK_SIZE):
+    """Yield (paragraph, start, end) for every non-empty paragraph of buffer plus whatever reader has left.
+
+    Separators only ever match whitespace, so everything up to the trailing
+    whitespace of the buffer can be searched before the next block is read.
+    Reads grow with the carried-over buffer, which keeps the total work linear
+    even for a single huge paragraph.
+    """
+    offset = 0  # source offset of buffer[0]
+    para = 0    # start of the current paragraph in buffer
+    scan = 0    # every position before this has been searched for a separator
+    eof = reader is None
+    while True:
+        if not eof:
+            block = reader.read(max(block_size, len(buffer)))
+            if block:
+                buffer += block
+            else:
+                eof = True
+        end = len(buffer) if eof else len(buffer.rstrip())
+        for match in PARAGRAPH_PATTERN.finditer(buffer, scan, end):
+            paragraph = _strip_span(buffer[para:match.start()], offset + para)
+            if paragraph[0]:
+                yield paragraph
+            para = match.end()
+        if eof:
+            paragraph = _strip_span(buffer[para:], offset + para)
+            if paragraph[0]:
+                yield paragraph
+            return
+        scan = max(end, para) - para
+        buffer = buffer[para:]
+        offset += para
+        para = 0
+
+def _iter_sentences(paragraph, offset):
+    """Yield (sentence, start, end) for the sentences of a paragraph found at offset"""
+    position = 0
+    for match in SENTENCE_PATTERN.finditer(paragraph):
+        yield paragraph[position:match.start()], offset + position, offset + match.start()
+        position = match.end()
+    yield paragraph[position:], offset + position, offset + len(paragraph)
+
+def iter_chunks(source, max_size=MAX_CHUNK_SIZE, block_size=READ_BLOCK_SIZE):
+    """Yield (chunk, start, end) with the same chunk boundaries as split_text_smart.
+
+    source is a string or a text reader such as an open file, which is read
+    block_size characters at a time. start and end are character offsets of
+    the chunk in the source; a chunk made of several paragraphs or sentences
+    has their separators collapsed to single spaces.
+    """
+    if isinstance(source, str):
+        buffer, reader = source, None
+    else:
+        buffer, reader = source.read(max_size + 1), source
+    if len(buffer) <= max_size:
+        yield buffer, 0, len(buffer)
+        return
+
+    # The current chunk is kept as a list of parts, joined once when it is emitted
+    parts, size, chunk_start, chunk_end = [], 0, 0, 0
+    for paragraph, para_start, para_end in _iter_paragraphs(buffer, reader, block_size):
         # If adding this paragraph would exceed limit
-        if len(current_chunk) + len(paragraph) + 1 > max_size:  # +1 for space
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-                current_chunk = ""
-            
+        if size + len(paragraph) + 1 > max_size:  # +1 for space
+            if parts:
+                yield _join_span(parts, chunk_start, chunk_end)
+                parts, size = [], 0
+
             # If single paragraph is too long, split by sentences
             if len(paragraph) > max_size:
-                sentences = re.split(r'(?<=[.!?])\s+', paragraph)
-                temp_chunk = ""
-                
-                for sentence in sentences:
-                    if len(temp_chunk) + len(sentence) + 1 > max_size:
-                        if temp_chunk:
-                            chunks.append(temp_chunk.strip())
-                            temp_chunk = ""
-                    
+                sentence_parts, sentence_size, sentence_start, sentence_end = [], 0, 0, 0
+                for sentence, start, end in _iter_sentences(paragraph, para_start):
+                    if sentence_size + len(sentence) + 1 > max_size:
+                        if sentence_parts:
+                            yield _join_span(sentence_parts, sentence_start, sentence_end)
+                            sentence_parts, sentence_size = [], 0
+
                     # If single sentence is still too long, force split
                     if len(sentence) > max_size:
-                        while len(sentence) > max_size:
-                            chunks.append(sentence[:max_size].strip())
-                            sentence = sentence[max_size:]
-                        if sentence.strip():
-                            temp_chunk = sentence
+                        cut = 0
+                        while len(sentence) - cut > max_size:
+                            yield _strip_span(sentence[cut:cut + max_size], start + cut)
+                            cut += max_size
+                        if sentence[cut:].strip():
+                            sentence_parts, sentence_size = [sentence[cut:]], len(sentence) - cut
+                            sentence_start, sentence_end = start + cut, end
                     else:
-                        temp_chunk += (" " if temp_chunk else "") + sentence
-                
-                if temp_chunk.strip():
-                    current_chunk = temp_chunk
+                        if not sentence_parts:
+                            sentence_start = start
+                        sentence_size += len(sentence) + (1 if sentence_parts else 0)
+                        sentence_parts.append(sentence)
+                        sentence_end = end
+
+                if sentence_parts:
+                    parts, size = sentence_parts, sentence_size
+                    chunk_start, chunk_end = sentence_start, sentence_end
             else:
-                current_chunk = paragraph
+                parts, size = [paragraph], len(paragraph)
+                chunk_start, chunk_end = para_start, para_end
         else:
-            current_chunk += (" " if current_chunk else "") + paragraph
-    
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+            if not parts:
+                chunk_start = para_start
+            size += len(paragraph) + (1 if parts else 0)
+            parts.append(paragraph)
+            chunk_end = para_end
+
+    if parts:
+        yield _join_span(parts, chunk_start, chunk_end)
+
+def split_text_smart(text, max_size=MAX_CHUNK_SIZE):
+    """Split text into chunks at natural breakpoints (sentences, paragraphs)"""
+    return [chunk for chunk, start, end in iter_chunks(text, max_size)]
 
-def translate_text(text, translator, target_lang):
-    """Translate a single chunk of text"""
-    cmd = ['trans', f'--translators={translator}', '-b', f':{target_lang}', text]
-    result = subprocess.run(cmd, capture_output=True, text=True)
+def pack_chunks(chunks, max_size=MAX_CHUNK_SIZE):
+    """Repack chunks sentence by sentence so each one is filled close to max_size"""
+    packed = []
+    parts = []
+    size = 0
+    for chunk in chunks:
+        for sentence in SENTENCE_PATTERN.split(chunk):
+            if not sentence:
+                continue
+            added = len(sentence) + (1 if parts else 0)
+            if parts and size + added > max_size:
+                packed.append(" ".join(parts))
+                parts = []
+                size = 0
+                added = len(sentence)
+            parts.append(sentence)
+            size += added
+    if parts:
+        packed.append(" ".join(parts))
+    return packed
 
-    if result.returncode != 0:
-        raise RuntimeError(f"[{translator}] Translate Shell error: {result.stderr.strip()}")
+def translate_text(text, translator, target_lang, memory=None, request_id=None):
+    """Translate a single chunk of text, reusing a stored translation if there is one"""
+    with tracing.span("translate", request_id, bytes_in=tracing.num_bytes(text)) as span:
+        translated = None
+        if memory is not None:
+            translated = memory.get(text, translator.name, target_lang)
+        span.set(cache_hit=None if memory is None else translated is not None)
+        if translated is None:
+            # Remove any line breaks from the translation result
+            translated = translator.translate(text, target_lang).replace('\n', ' ').replace('\r', ' ')
+            if memory is not None:
+                memory.put(text, translator.name, target_lang, translated)
+        span.set(bytes_out=tracing.num_bytes(translated))
+    return translated
 
-    # Remove any line breaks from the translation result
-    return result.stdout.strip().replace('\n', ' ').replace('\r', ' ')
+def translate_with_chunking(text, translator, target_lang, memory=None, batch_size=BATCH_SIZE, max_in_flight=1):
+    """Translate text, splitting into chunks if necessary.
 
-def translate_with_chunking(text, translator, target_lang):
-    """Translate text, splitting into chunks if necessary"""
+    Chunks are repacked to fill MAX_CHUNK_SIZE and sent batch_size at a time
+    per backend call, up to max_in_flight calls at once through an
+    AsyncTranslator; a batch that fails is retried chunk by chunk.
+    """
     print(f"Text length: {len(text)} characters")
     
     if len(text) <= MAX_CHUNK_SIZE:
         print("Translating as single chunk...")
-        return translate_text(text, translator, target_lang)
+        return translate_text(text, translator, target_lang, memory)
     
-    # Split into chunks
-    chunks = split_text_smart(text, MAX_CHUNK_SIZE)
+    # Split into chunks, then repack them as full as possible
+    chunks = pack_chunks(split_text_smart(text, MAX_CHUNK_SIZE), MAX_CHUNK_SIZE)
     print(f"Split into {len(chunks)} chunks")
-    
-    translated_chunks = []
-    for i, chunk in enumerate(chunks, 1):
-        print(f"Translating chunk {i}/{len(chunks)} ({len(chunk)} chars)...")
-        try:
-            translated_chunk = translate_text(chunk, translator, target_lang)
-            translated_chunks.append(translated_chunk)
-        except RuntimeError as e:
-            print(f"Error translating chunk {i}: {e}")
-            translated_chunks.append(f"[TRANSLATION FAILED FOR CHUNK {i}]")
+
+    translated_chunks = [None] * len(chunks)
+    if memory is not None:
+        for i, chunk in enumerate(chunks):
+            translated_chunks[i] = memory.get(chunk, translator.name, target_lang)
+    missing = [i for i, translated in enumerate(translated_chunks) if translated is None]
+    batches = [missing[start:start + batch_size] for start in range(0, len(missing), batch_size)]
+    print(f"Translating {len(missing)} chunks in {len(batches)} {translator.name} calls...")
+
+    # Backend calls run on worker threads; memory is only touched from the event loop's thread
+    async_translator = AsyncTranslator(translator, max_in_flight)
+
+    async def translate_batch(batch):
+        if len(batch) > 1:
+            try:
+                texts = [chunks[i] for i in batch]
+                with tracing.span("translate", bytes_in=tracing.num_bytes("".join(texts)), chunks=len(batch), cache_hit=None if memory is None else False) as span:
+                    translations = await async_translator.translate_batch(texts, target_lang)
+                    span.set(bytes_out=tracing.num_bytes("".join(translations)))
+            except RuntimeError as e:
+                print(f"Batch of chunks {batch[0] + 1}-{batch[-1] + 1} failed ({e}); translating them one by one")
+            else:
+                for i, translated_chunk in zip(batch, translations):
+                    translated_chunks[i] = translated_chunk.replace('\n', ' ').replace('\r', ' ')
+                    if memory is not None:
+                        memory.put(chunks[i], translator.name, target_lang, translated_chunks[i])
+                return
+
+        for i in batch:
+            print(f"Translating chunk {i + 1}/{len(chunks)} ({len(chunks[i])} chars)...")
+            try:
+                with tracing.span("translate", bytes_in=tracing.num_bytes(chunks[i])) as span:
+                    translated_chunks[i] = (await async_translator.translate(chunks[i], target_lang)).replace('\n', ' ').replace('\r', ' ')
+                    span.set(bytes_out=tracing.num_bytes(translated_chunks[i]))
+            except (RuntimeError, OSError) as e:
+                print(f"Error translating chunk {i + 1}: {e}")
+                translated_chunks[i] = f"[TRANSLATION FAILED FOR CHUNK {i + 1}]"
+            else:
+                if memory is not None:
+                    memory.put(chunks[i], translator.name, target_lang, translated_chunks[i])
+
+    async def translate_batches():
+        await asyncio.gather(*(translate_batch(batch) for batch in batches))
+
+    asyncio.run(translate_batches())
     
     # Concatenate all translated chunks with spaces (no line breaks)
     return " ".join(translated_chunks)
 
 def main():
+    parser = argparse.ArgumentParser()
+    add_translator_arguments(parser)
+    parser.add_argument('--max-in-flight', type=int, default=1, help='backend calls at once (at most --pool-size for --backend http)')
+    parser.add_argument('--trace', default=None, help='append per-call timing spans to this JSONL file (see cli/trace_analyzer.py)')
+    args = parser.parse_args()
+    backend = make_translator(args, translator, brief=True)
+    tracer = tracing.configure(args.trace)
+
     print("=== ORIGINAL TEXT ===")
     print(text_to_translate)
     print("\n" + "="*50 + "\n")
     
     print("=== TRANSLATION ===")
+    memory = TranslationMemory(TRANSLATION_MEMORY)
     try:
-        translated_text = translate_with_chunking(text_to_translate, translator, target_lang)
+        translated_text = translate_with_chunking(text_to_translate, backend, target_lang, memory, max_in_flight=args.max_in_flight)
         print(translated_text)
     except Exception as e:
         print(f"Translation failed: {e}")
+    print(f"Translation memory: {memory.stats()}")
+    memory.close()
+    backend.close()
+    tracer.close()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,181 @@
+import asyncio
+import http.client
+import json
+import os
+import queue
+import re
+import subprocess
+import tempfile
+from typing import List, Protocol
+from urllib.parse import urlsplit
+
+BACKENDS = ['shell', 'http']
+DEFAULT_ENDPOINT = 'http://localhost:5000/translate'  # LibreTranslate's default
+DEFAULT_POOL_SIZE = 8
+DEFAULT_TIMEOUT = 60
+BATCH_MARKER = '[[[{}]]]'
+BATCH_MARKER_PATTERN = re.compile(r'\[\[\[\s*(\d+)\s*\]\]\]')
+
+class Translator(Protocol):
+    """A translation backend; errors are raised as RuntimeError"""
+    name: str
+
+    def translate(self, text: str, target_lang: str) -> str: ...
+
+    def translate_batch(self, texts: List[str], target_lang: str) -> List[str]: ...
+
+    def close(self) -> None: ...
+
+class ShellTranslator:
+    """Translates by running translate-shell once per call (the original behaviour)"""
+    def __init__(self, translator='google', brief=False):
+        self.name = translator
+        self.brief = brief
+
+    def _run(self, args):
+        cmd = ['trans', f'--translators={self.name}'] + (['-b'] if self.brief else []) + args
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"[{self.name}] Translate Shell error: {result.stderr.strip()}")
+        return result.stdout
+
+    def translate(self, text, target_lang):
+        return self._run([f':{target_lang}', text]).strip()
+
+    def translate_batch(self, texts, target_lang):
+        """Translate several texts with a single trans invocation.
+
+        The texts are written to an input file, each preceded by a numbered
+        marker line, and the translation is split back on those markers.
+        Raises RuntimeError if the markers do not come back intact.
+        """
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', encoding='utf-8', delete=False) as f:
+            for i, text in enumerate(texts):
+                f.write(BATCH_MARKER.format(i) + '\n' + text.replace('\n', ' ').replace('\r', ' ') + '\n')
+            input_path = f.name
+        try:
+            output = self._run([f':{target_lang}', '-i', input_path])
+        finally:
+            os.remove(input_path)
+
+        parts = BATCH_MARKER_PATTERN.split(output)
+        if parts[1::2] != [str(i) for i in range(len(texts))]:
+            raise RuntimeError(f"[{self.name}] batch markers were altered in translation")
+        return [part.strip() for part in parts[2::2]]
+
+    def close(self):
+        pass
+
+class HTTPTranslator:
+    """Translates through a LibreTranslate-style JSON endpoint over pooled keep-alive connections.
+
+    Each request POSTs {"q", "source", "target", "format"} and reads back
+    "translatedText"; a batch sends a list as "q". Idle connections are kept
+    in a pool of up to pool_size and reused by whichever thread needs one, so
+    worker threads do not pay a TCP (or TLS) handshake per chunk. The name,
+    which keys translation memory and names output folders, defaults to one
+    derived from the endpoint (e.g. http-localhost-5000-translate).
+    """
+    def __init__(self, endpoint=DEFAULT_ENDPOINT, name=None, api_key=None, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        url = urlsplit(endpoint)
+        if url.scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported translation endpoint: {endpoint}")
+        self.name = name or 'http-' + re.sub(r'[^A-Za-z0-9]+', '-', url.netloc + url.path).strip('-')
+        self.api_key = api_key
+        self.timeout = timeout
+        self.connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.host = url.netloc
+        self.path = (url.path or '/') + (f'?{url.query}' if url.query else '')
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _acquire(self):
+        try:
+            return self.pool.get_nowait()
+        except queue.Empty:
+            return self.connection_class(self.host, timeout=self.timeout)
+
+    def _release(self, conn):
+        try:
+            self.pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _post(self, payload):
+        if self.api_key:
+            payload['api_key'] = self.api_key
+        body = json.dumps(payload).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        # A pooled connection may have been closed by the server while idle, so retry once on a fresh one
+        for attempt in range(2):
+            conn = self._acquire() if attempt == 0 else self.connection_class(self.host, timeout=self.timeout)
+            try:
+                conn.request('POST', self.path, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                if attempt == 1:
+                    raise RuntimeError(f"[{self.name}] request failed: {e}")
+                continue
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            if response.status != 200:
+                raise RuntimeError(f"[{self.name}] HTTP {response.status}: {data.decode('utf-8', 'replace').strip()}")
+            try:
+                return json.loads(data)['translatedText']
+            except (ValueError, KeyError) as e:
+                raise RuntimeError(f"[{self.name}] unexpected response: {e}")
+
+    def translate(self, text, target_lang):
+        return self._post({'q': text, 'source': 'auto', 'target': target_lang, 'format': 'text'}).strip()
+
+    def translate_batch(self, texts, target_lang):
+        translations = self._post({'q': list(texts), 'source': 'auto', 'target': target_lang, 'format': 'text'})
+        if not isinstance(translations, list) or len(translations) != len(texts):
+            raise RuntimeError(f"[{self.name}] batch response does not match the request")
+        return [translation.strip() for translation in translations]
+
+    def close(self):
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+class AsyncTranslator:
+    """Awaitable wrapper around a Translator for asyncio callers.
+
+    Calls run on worker threads, at most max_in_flight at a time; with an
+    HTTPTranslator, keep max_in_flight at or below its pool size so every
+    call gets a kept-alive connection.
+    """
+    def __init__(self, translator, max_in_flight=DEFAULT_POOL_SIZE):
+        self.translator = translator
+        self.name = translator.name
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def translate(self, text, target_lang):
+        async with self.semaphore:
+            return await asyncio.to_thread(self.translator.translate, text, target_lang)
+
+    async def translate_batch(self, texts, target_lang):
+        async with self.semaphore:
+            return await asyncio.to_thread(self.translator.translate_batch, texts, target_lang)
+
+    def close(self):
+        self.translator.close()
+
+def add_translator_arguments(parser):
+    """Add the backend selection flags shared by the translate scripts"""
+    parser.add_argument('--backend', choices=BACKENDS, default='shell', help='translate-shell subprocesses or an HTTP endpoint')
+    parser.add_argument('--endpoint', default=DEFAULT_ENDPOINT, help='translation endpoint for --backend http')
+    parser.add_argument('--api-key', default=None, help='API key sent to the endpoint')
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE, help='kept-alive connections for --backend http')
+
+def make_translator(args, translator='google', brief=False):
+    """Build the Translator selected by add_translator_arguments flags"""
+    if args.backend == 'http':
+        return HTTPTranslator(args.endpoint, api_key=args.api_key, pool_size=args.pool_size)
+    return ShellTranslator(translator, brief=brief)
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import tempfile
+
+HASH_BLOCK_SIZE = 1 << 20
+
+def file_hash(path):
+    """sha256 of a file's contents, read block by block"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def write_atomic(path, text):
+    """Write text to path through a temporary file in the same folder, so readers never see half a file"""
+    folder = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.tmp-', suffix=os.path.splitext(path)[1])
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+class TranslationManifest:
+    """Record of which source files have been translated, for incremental folder runs.
+
+    Each source path maps to the size, mtime and content hash it had when it
+    was translated, and the output it was written to. A file is skipped while
+    that output still exists and the file is unchanged: matching size and
+    mtime are trusted as is, otherwise the content hash decides (so a file
+    that was only touched is not translated again).
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)['files']
+
+    @staticmethod
+    def key(source_path):
+        return os.path.abspath(source_path)
+
+    def is_current(self, entry, output_path):
+        """True if the os.DirEntry entry was already translated to output_path and has not changed since"""
+        record = self.entries.get(self.key(entry.path))
+        if record is None or record['output'] != os.path.abspath(output_path) or not os.path.exists(output_path):
+            return False
+        stat = entry.stat()
+        if record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+            return True
+        if record['size'] != stat.st_size or record['sha256'] != file_hash(entry.path):
+            return False
+        record['mtime_ns'] = stat.st_mtime_ns
+        self.dirty = True
+        return True
+
+    def record(self, source_path, output_path, stat, sha256):
+        """Remember that source_path, as it was at stat with hash sha256, was translated to output_path"""
+        self.entries[self.key(source_path)] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256,
+            'output': os.path.abspath(output_path),
+        }
+        self.dirty = True
+
+    def save(self):
+        """Write the manifest out if anything changed since it was loaded or last saved"""
+        if not self.dirty:
+            return
+        self.dirty = False
+        write_atomic(self.path, json.dumps({'files': self.entries}, indent=1, sort_keys=True))
@@ -0,0 +1,78 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+
+DEFAULT_MAX_ENTRIES = 500000
+
+class TranslationMemory:
+    """Disk-backed translation memory shared by the translate-shell scripts.
+
+    Translations are keyed by (hash of the normalized source chunk, translator,
+    target_lang); normalization collapses whitespace so the same paragraph
+    scraped from different outlets hits the same entry. Least recently used
+    entries beyond max_entries are evicted. Safe to use from worker threads.
+    """
+    def __init__(self, db_path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "source_hash TEXT, translator TEXT, target_lang TEXT, translation TEXT NOT NULL, accessed REAL NOT NULL, "
+            "PRIMARY KEY (source_hash, translator, target_lang))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS translations_accessed ON translations (accessed)")
+        self.conn.commit()
+
+    @staticmethod
+    def source_hash(text):
+        normalized = unicodedata.normalize('NFC', ' '.join(text.split()))
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def get(self, text, translator, target_lang):
+        """Return the stored translation of text, or None"""
+        key = (self.source_hash(text), translator, target_lang)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT translation FROM translations WHERE source_hash = ? AND translator = ? AND target_lang = ?", key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute(
+                "UPDATE translations SET accessed = ? WHERE source_hash = ? AND translator = ? AND target_lang = ?",
+                (time.time(),) + key
+            )
+            self.conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, text, translator, target_lang, translation):
+        key = (self.source_hash(text), translator, target_lang)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO translations (source_hash, translator, target_lang, translation, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                key + (translation, time.time())
+            )
+            self.conn.execute(
+                "DELETE FROM translations WHERE rowid IN "
+                "(SELECT rowid FROM translations ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        self.conn.close()